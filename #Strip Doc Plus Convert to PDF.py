@@ -1,79 +1,64 @@
 #Strip Doc Plus Convert to PDF
 
-from docx import Document
 import os
-from pdf2docx import Converter
 
-def remove_text_tables_and_images(input_directory, output_directory, pdf_output_directory):
-    text_to_remove = "This document was exported from DFE. Any edits made during review must be copied back into DFE and follow its content structures and best practices."
+from docx_pipeline.BatchJournal import BatchJournal
+from docx_pipeline.BatchRunner import list_input_files, run_batch
+from docx_pipeline.BuildManifest import config_version
+from docx_pipeline.PdfRenderer import render_pdfs
+from docx_pipeline.StripRules import load_rules
+from docx_pipeline.StripWordDoc import STRIP_ENGINE_VERSION, format_removed, strip_document
+
+def process_file(filename, doc_path, output_path, rules):
+    """Batch worker: strips one document; the PDF is rendered afterwards by the renderer pool."""
+    removed = strip_document(doc_path, output_path, rules)
+    print(f"✅ Processed: {filename} ({format_removed(removed)})")
+
+def remove_text_tables_and_images(input_directory, output_directory, pdf_output_directory, workers=None,
+                                  pdf_workers=2, pdf_timeout=120, rules_path=None, journal=False, retry_failed=False,
+                                  limits=None):
+    """journal, retry_failed and limits cover the strip step, as in StripWordDoc.remove_text_tables_and_images."""
+    # Same rules file and stripping engine as StripWordDoc.py
+    rules = load_rules(rules_path)
 
     # Ensure output directories exist
     os.makedirs(output_directory, exist_ok=True)
     os.makedirs(pdf_output_directory, exist_ok=True)
 
-    for filename in os.listdir(input_directory):
-        if filename.startswith("~$") or not filename.endswith(".docx"):
-            continue  # Skip temporary or non-Word files
+    filenames, skipped = list_input_files(input_directory)  # Skip temporary or non-Word files
 
+    jobs = []
+    paths = {}
+    for filename in filenames:
         doc_path = os.path.join(input_directory, filename)
         output_path = os.path.join(output_directory, filename)
-        pdf_output_path = os.path.join(pdf_output_directory, filename.replace(".docx", ".pdf"))
-
-        try:
-            doc = Document(doc_path)
-
-            # ✅ **Step 1: Remove tables containing the specific text**
-            tables_to_remove = []
-            for i, table in enumerate(doc.tables):
-                if any(text_to_remove in cell.text for row in table.rows for cell in row.cells):
-                    tables_to_remove.append(i)
-            for i in sorted(tables_to_remove, reverse=True):
-                tbl = doc.tables[i]._element
-                tbl.getparent().remove(tbl)
-
-            # ✅ **Step 2: Remove tables with "Audience" in the first row**
-            tables_to_remove = []
-            for i, table in enumerate(doc.tables):
-                if table.rows and any(cell.text.strip().lower() == "audience" for cell in table.rows[0].cells):
-                    tables_to_remove.append(i)
-            for i in sorted(tables_to_remove, reverse=True):
-                tbl = doc.tables[i]._element
-                tbl.getparent().remove(tbl)
-
-            # ✅ **Step 3: Remove all images from the document**
-            for para in doc.paragraphs:
-                for run in para.runs:
-                    if run._element.findall(".//{http://schemas.openxmlformats.org/wordprocessingml/2006/main}drawing") or \
-                       run._element.findall(".//{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pict"):
-                        run._element.getparent().remove(run._element)
-
-            # ✅ **Step 4: Remove images inside tables**
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for para in cell.paragraphs:
-                            for run in para.runs:
-                                if run._element.findall(".//{http://schemas.openxmlformats.org/wordprocessingml/2006/main}drawing") or \
-                                   run._element.findall(".//{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pict"):
-                                    run._element.getparent().remove(run._element)
-
-            # Save the cleaned Word document
-            doc.save(output_path)
-            print(f"✅ Processed: {filename}")
-
-            # ✅ **Step 5: Convert cleaned Word document to PDF**
-            cv = Converter(output_path)
-            cv.convert(pdf_output_path, start=0, end=None)  # Convert entire document
-            cv.close()
-            print(f"📄 Converted to PDF: {filename.replace('.docx', '.pdf')}")
-
-        except Exception as e:
-            print(f"❌ Error processing {filename}: {e}")
-
-# Example usage
-input_directory = "/Users/km/Documents/Projects/Combine_Word_Docs/Convert"
-output_directory = "/Users/km/Documents/Projects/Combine_Word_Docs/Clean"
-pdf_output_directory = "/Users/km/Documents/Projects/Combine_Word_Docs/PDFs"
-
-remove_text_tables_and_images(input_directory, output_directory, pdf_output_directory)
-
+        paths[filename] = (doc_path, output_path)
+        jobs.append((filename, (filename, doc_path, output_path, rules)))
+
+    batch_journal = None
+    if journal or retry_failed:
+        version = config_version(STRIP_ENGINE_VERSION, rules.version)
+        batch_journal = BatchJournal(output_directory, "StripWordDoc", version, paths)
+    summary = run_batch(process_file, jobs, workers=workers, skipped=skipped, stage="strip", journal=batch_journal,
+                        retry_failed=retry_failed, limits=limits)
+
+    # ✅ **Step 5: Render the cleaned documents to PDF on a pool of warm LibreOffice workers**
+    pdf_jobs = [
+        (filename, os.path.join(output_directory, filename),
+         os.path.join(pdf_output_directory, filename.replace(".docx", ".pdf")))
+        for filename in summary["succeeded"]
+    ]
+    pdf_summary = render_pdfs(pdf_jobs, workers=pdf_workers, timeout=pdf_timeout, resume=batch_journal is not None)
+
+    # Documents that failed to strip never reached the PDF stage; count them as failed overall
+    pdf_summary["failed"][:0] = summary["failed"]
+    pdf_summary["skipped"] = summary["skipped"]
+    return pdf_summary
+
+if __name__ == "__main__":
+    # Example usage
+    input_directory = "/Users/km/Documents/Projects/Combine_Word_Docs/Convert"
+    output_directory = "/Users/km/Documents/Projects/Combine_Word_Docs/Clean"
+    pdf_output_directory = "/Users/km/Documents/Projects/Combine_Word_Docs/PDFs"
+
+    remove_text_tables_and_images(input_directory, output_directory, pdf_output_directory)
@@ -0,0 +1,223 @@
+"""Measures throughput and peak memory of every stage on synthetic corpora, and catches regressions.
+
+Usage: python Benchmark.py [--profiles text,tables,images,mixed] [--stages strip,json-text,...]
+                           [--count 20] [--seed 0] [--repeat 3] [--corpus-dir DIR]
+                           [--baseline benchmark_baseline.json] [--save-baseline] [--tolerance 0.25]
+
+Each stage runs over the whole corpus in a fresh subprocess, so its peak RSS is its own,
+and the fastest of --repeat runs is kept to smooth out noise.
+Results are compared against the baseline file: a stage fails if its docs/s drops, or its
+peak RSS grows, by more than the tolerance, and the run exits with status 1. Baselines
+are only comparable on the machine that recorded them; --save-baseline (re)writes them.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from BenchmarkCombine import peak_rss_mb
+from SyntheticCorpus import PROFILES, make_corpus
+
+# strip       - StripWordDoc.py / the strip half of "#Strip Doc Plus Convert to PDF.py"
+# pdf         - the PDF half of "#Strip Doc Plus Convert to PDF.py" (needs unoserver and LibreOffice)
+# combine     - CombineWordDocs.py, streaming engine, the whole corpus into one document
+# json-text   - JSONgemini.py
+# json-tables - JSONwTable.py
+# pipeline    - docx-pipeline's fused strip + json-tables pass
+STAGES = ("strip", "pdf", "combine", "json-text", "json-tables", "pipeline")
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+def run_stage(stage, input_paths, output_dir):
+    """Runs one stage over input_paths in this process."""
+    if stage == "strip":
+        from docx_pipeline.StripRules import load_rules
+        from docx_pipeline.StripWordDoc import strip_document
+
+        rules = load_rules()
+        for path in input_paths:
+            strip_document(path, os.path.join(output_dir, os.path.basename(path)), rules)
+    elif stage == "pdf":
+        from docx_pipeline.PdfRenderer import render_pdfs
+
+        jobs = [(os.path.basename(p), p, os.path.join(output_dir, os.path.basename(p) + ".pdf")) for p in input_paths]
+        summary = render_pdfs(jobs, workers=1)
+        if summary["failed"]:
+            raise RuntimeError(f"{len(summary['failed'])} documents failed to render")
+    elif stage == "combine":
+        from docx_pipeline.StreamingMerge import merge_documents_streaming
+
+        merge_documents_streaming(input_paths, os.path.join(output_dir, "combined.docx"))
+    elif stage in ("json-text", "json-tables"):
+        from docx_pipeline import JSONgemini, JSONwTable
+
+        converter = JSONgemini if stage == "json-text" else JSONwTable
+        for path in input_paths:
+            if not converter.docx_to_json(path, os.path.join(output_dir, os.path.basename(path) + ".json")):
+                raise RuntimeError(f"Conversion failed: {path}")
+    elif stage == "pipeline":
+        from docx_pipeline.Pipeline import process_document
+        from docx_pipeline.StripRules import load_rules
+
+        rules = load_rules()
+        settings = {"merge_mode": None, "json_converter": "tables", "output_format": "pretty", "table_layout": "records"}
+        os.makedirs(os.path.join(output_dir, "Clean"), exist_ok=True)
+        os.makedirs(os.path.join(output_dir, "JSON"), exist_ok=True)
+        for path in input_paths:
+            process_document(os.path.basename(path), [path], output_dir, ("strip", "json"), rules, settings)
+    else:
+        raise ValueError(f"Unknown stage {stage!r}, expected one of {STAGES}")
+
+def run_one(stage, corpus, output_dir):
+    """Child process entry point: runs the stage once and prints seconds and peak RSS as JSON."""
+    import contextlib
+    import io
+
+    input_paths = sorted(os.path.join(corpus, f) for f in os.listdir(corpus) if f.endswith(".docx"))
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_stage(stage, input_paths, output_dir)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"seconds": elapsed, "peak_mb": peak_rss_mb()}))
+
+def stage_available(stage):
+    if stage != "pdf":
+        return True
+    try:
+        import unoserver  # noqa: F401
+    except ImportError:
+        return False
+    return shutil.which("unoserver") is not None
+
+def measure(stage, corpus, output_dir, repeat=3):
+    """Runs the stage repeat times and keeps the fastest time and the largest peak RSS."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    runs = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, os.path.abspath(__file__), "--run", stage, corpus, output_dir],
+                                cwd=here, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed")
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    measured = {"seconds": min(run["seconds"] for run in runs), "peak_mb": max(run["peak_mb"] for run in runs)}
+
+    paths = [os.path.join(corpus, f) for f in os.listdir(corpus) if f.endswith(".docx")]
+    megabytes = sum(os.path.getsize(p) for p in paths) / (1024 * 1024)
+    seconds = max(measured["seconds"], 1e-9)
+    return {
+        "docs": len(paths),
+        "mb": round(megabytes, 2),
+        "seconds": round(seconds, 3),
+        "docs_per_s": round(len(paths) / seconds, 2),
+        "mb_per_s": round(megabytes / seconds, 2),
+        "peak_mb": round(measured["peak_mb"], 1),
+    }
+
+def compare(result, baseline, tolerance):
+    """Returns the list of regressions of result against its baseline entry."""
+    problems = []
+    if baseline is None:
+        return problems
+    if result["docs_per_s"] < baseline["docs_per_s"] * (1 - tolerance):
+        problems.append(f"docs/s {result['docs_per_s']:.1f} < baseline {baseline['docs_per_s']:.1f}")
+    if result["peak_mb"] > baseline["peak_mb"] * (1 + tolerance):
+        problems.append(f"peak MB {result['peak_mb']:.1f} > baseline {baseline['peak_mb']:.1f}")
+    return problems
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_baseline(path, results, settings):
+    data = {
+        "machine": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "settings": settings,
+        "results": results,
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1)
+    os.replace(tmp_path, path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every stage on synthetic corpora.")
+    parser.add_argument("--profiles", default=",".join(PROFILES), help="comma-separated corpus profiles")
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma-separated stages")
+    parser.add_argument("--count", type=int, default=20, help="documents per corpus (default: 20)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage, fastest one counts (default: 3)")
+    parser.add_argument("--corpus-dir", help="keep generated corpora here between runs (default: a temp folder)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="record these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown/growth (default: 0.25)")
+    args = parser.parse_args(argv)
+
+    profiles = [p for p in args.profiles.split(",") if p]
+    stages = [s for s in args.stages.split(",") if s]
+    for name, known, kind in ((profiles, PROFILES, "profile"), (stages, STAGES, "stage")):
+        unknown = set(name) - set(known)
+        if unknown:
+            parser.error(f"unknown {kind}(s): {', '.join(sorted(unknown))}")
+
+    settings = {"count": args.count, "seed": args.seed}
+    baseline = load_baseline(args.baseline)
+    if baseline and baseline.get("settings") != settings:
+        print(f"⚠️ Baseline was recorded with {baseline.get('settings')}, not {settings}; not comparing")
+        baseline = {}
+    baseline_results = baseline.get("results", {})
+
+    results = {}
+    regressions = []
+    print(f"{'profile':>8} {'stage':>12} {'docs':>5} {'MB':>7} {'seconds':>8} {'docs/s':>8} {'MB/s':>7} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory(prefix="benchmark_") as tmp:
+        corpus_root = args.corpus_dir or os.path.join(tmp, "corpus")
+        for profile in profiles:
+            corpus = os.path.join(corpus_root, f"{profile}_{args.count}_{args.seed}")
+            make_corpus(corpus, profile, args.count, args.seed)
+            for stage in stages:
+                key = f"{profile}:{stage}"
+                if not stage_available(stage):
+                    print(f"{profile:>8} {stage:>12}  ⏭️ skipped (unoserver/LibreOffice not installed)")
+                    continue
+                try:
+                    result = measure(stage, corpus, os.path.join(tmp, "out", profile, stage), args.repeat)
+                except RuntimeError as e:
+                    print(f"{profile:>8} {stage:>12}  ❌ {e}")
+                    regressions.append(f"{key}: failed")
+                    continue
+
+                results[key] = result
+                problems = compare(result, baseline_results.get(key), args.tolerance)
+                regressions.extend(f"{key}: {problem}" for problem in problems)
+                print(f"{profile:>8} {stage:>12} {result['docs']:>5} {result['mb']:>7.1f} {result['seconds']:>8.2f} "
+                      f"{result['docs_per_s']:>8.1f} {result['mb_per_s']:>7.1f} {result['peak_mb']:>8.1f}"
+                      f"{'  ❌ regression' if problems else ''}")
+
+    if args.save_baseline:
+        # Keep baseline entries for profiles/stages this run didn't cover
+        save_baseline(args.baseline, {**baseline_results, **results}, settings)
+        print(f"\n✅ Baseline saved to {args.baseline}")
+        return 0
+
+    if regressions:
+        print("\n❌ Regressions against the baseline:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    if baseline_results:
+        print("\n✅ No regressions against the baseline")
+    return 0
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--run":
+        run_one(*sys.argv[2:5])
+    else:
+        sys.exit(main())
@@ -0,0 +1,68 @@
+"""Compares memory and time of the docxcompose and streaming merge modes, sequential and as a merge tree.
+
+Usage: python BenchmarkCombine.py [counts...]   (defaults to 10 100 1000)
+
+Each merge runs in a fresh subprocess so its peak RSS is measured on its own
+(for the tree modes this is the coordinating process, not the pool workers).
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from SyntheticCorpus import make_corpus
+
+MODES = {
+    "composer": {"mode": "composer"},
+    "streaming": {"mode": "streaming"},
+    "composer-tree": {"mode": "composer", "tree": True},
+    "streaming-tree": {"mode": "streaming", "tree": True},
+}
+
+def peak_rss_mb():
+    """Peak RSS of this process. On Linux ru_maxrss can carry over from the forking parent, so prefer VmHWM."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / (1024 * 1024)
+
+def run_one(mode, input_folder, output_folder):
+    """Child process entry point: merge once and print seconds and peak RSS."""
+    import contextlib
+    import io
+    from docx_pipeline.CombineWordDocs import combine_word_documents
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        combine_word_documents(input_folder, output_folder, **MODES[mode])
+    elapsed = time.perf_counter() - start
+    print(f"{elapsed:.3f} {peak_rss_mb():.1f}")
+
+def main(counts):
+    here = os.path.dirname(os.path.abspath(__file__))
+    print(f"{'docs':>6} {'mode':>15} {'seconds':>9} {'peak MB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in counts:
+            corpus = os.path.join(tmp, f"corpus_{count}")
+            make_corpus(corpus, "text", count)
+            for mode in MODES:
+                result = subprocess.run(
+                    [sys.executable, __file__, "--run", mode, corpus, os.path.join(tmp, f"out_{count}_{mode}")],
+                    cwd=here, capture_output=True, text=True, check=True,
+                )
+                seconds, peak = result.stdout.split()
+                print(f"{count:>6} {mode:>15} {float(seconds):>9.2f} {float(peak):>9.1f}")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--run":
+        run_one(*sys.argv[2:5])
+    else:
+        main([int(n) for n in sys.argv[1:]] or [10, 100, 1000])
@@ -0,0 +1,130 @@
+"""Generates reproducible synthetic .docx corpora for the benchmarks.
+
+Usage: python SyntheticCorpus.py OUTPUT_DIR [profile] [count] [seed]
+
+Every document starts with the DFE export banner table, like real DFE exports, and
+some also get an "Audience" table, so the strip stage has real work to do. The rest
+(pages, headings, tables with merged cells, images) varies per profile and per document,
+drawn from a seeded random generator so the same arguments always give the same corpus.
+"""
+import io
+import os
+import random
+import struct
+import sys
+import zlib
+
+from docx import Document
+from docx.enum.text import WD_BREAK
+
+DFE_BANNER = ("This document was exported from DFE. Any edits made during review must be copied back "
+              "into DFE and follow its content structures and best practices.")
+
+# Ranges are inclusive (low, high); each document draws its own values from them
+PROFILES = {
+    "text": {
+        "pages": (3, 10), "heading_depth": 3, "tables": (0, 1), "table_rows": (3, 6), "table_cols": (2, 4),
+        "merged_cells": 0.0, "images": (0, 0), "image_px": (0, 0), "audience": 0.5, "banner": True,
+    },
+    "tables": {
+        "pages": (2, 5), "heading_depth": 2, "tables": (5, 15), "table_rows": (10, 60), "table_cols": (3, 8),
+        "merged_cells": 0.5, "images": (0, 1), "image_px": (64, 128), "audience": 0.5, "banner": True,
+    },
+    "images": {
+        "pages": (2, 6), "heading_depth": 2, "tables": (0, 2), "table_rows": (3, 8), "table_cols": (2, 4),
+        "merged_cells": 0.2, "images": (5, 20), "image_px": (256, 768), "audience": 0.5, "banner": True,
+    },
+    "mixed": {
+        "pages": (1, 20), "heading_depth": 3, "tables": (0, 8), "table_rows": (3, 30), "table_cols": (2, 6),
+        "merged_cells": 0.3, "images": (0, 6), "image_px": (64, 512), "audience": 0.5, "banner": True,
+    },
+}
+
+PARAGRAPHS_PER_PAGE = 8
+WORDS = ("the", "policy", "review", "content", "structure", "student", "course", "outcome", "assessment",
+         "module", "support", "guidance", "section", "evidence", "programme", "learning", "report", "staff")
+
+def png_bytes(rng, width, height):
+    """A valid RGB PNG of random noise, so images don't compress away to nothing."""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    rows = b"".join(b"\x00" + rng.randbytes(width * 3) for _ in range(height))
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows, 1)) + chunk(b"IEND", b"")
+
+def sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+def add_table(doc, rng, rows, cols, merge_probability, header=None):
+    table = doc.add_table(rows=rows, cols=cols)
+    for r, row in enumerate(table.rows):
+        for c, cell in enumerate(row.cells):
+            cell.text = f"R{r}C{c} {rng.choice(WORDS)}"
+    if header is not None:
+        table.cell(0, 0).text = header
+    if rows > 2 and cols > 1 and rng.random() < merge_probability:
+        # A vertical merge (vMerge) in the last column, then a horizontal merge (gridSpan) below it
+        table.cell(1, cols - 1).merge(table.cell(2, cols - 1))
+        if rows > 3:
+            r = rng.randrange(3, rows)
+            table.cell(r, 0).merge(table.cell(r, 1))
+    return table
+
+def make_document(path, rng, profile):
+    """Writes one synthetic document drawn from a PROFILES entry."""
+    def draw(key):
+        return rng.randint(*profile[key])
+
+    doc = Document()
+    if profile["banner"]:
+        banner = doc.add_table(rows=1, cols=1)
+        banner.cell(0, 0).text = DFE_BANNER
+    if rng.random() < profile["audience"]:
+        add_table(doc, rng, 2, 2, 0.0, header="Audience")
+
+    pages = draw("pages")
+    tables = draw("tables")
+    images = draw("images")
+    table_pages = [rng.randrange(pages) for _ in range(tables)]
+    image_pages = [rng.randrange(pages) for _ in range(images)]
+
+    for page in range(pages):
+        level = page % profile["heading_depth"] + 1
+        doc.add_heading(f"Heading {level} on page {page + 1}", level)
+        for _ in range(PARAGRAPHS_PER_PAGE):
+            doc.add_paragraph(" ".join(sentence(rng) for _ in range(4)))
+        doc.add_paragraph("- " + sentence(rng, 5))
+        doc.add_paragraph("- " + sentence(rng, 5))
+        for _ in range(table_pages.count(page)):
+            add_table(doc, rng, draw("table_rows"), draw("table_cols"), profile["merged_cells"])
+        for _ in range(image_pages.count(page)):
+            size = draw("image_px")
+            doc.add_paragraph().add_run().add_picture(io.BytesIO(png_bytes(rng, size, size)))
+        if page < pages - 1:
+            doc.add_paragraph().add_run().add_break(WD_BREAK.PAGE)
+
+    doc.save(path)
+
+def make_corpus(folder, profile="mixed", count=20, seed=0):
+    """Writes count documents into folder (skipping any already there) and returns their paths."""
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"{profile}.{i:05d}.docx")
+        if not os.path.exists(path):
+            # Seeded per document, so a larger corpus starts with the same files as a smaller one
+            make_document(path, random.Random(f"{seed}:{profile}:{i}"), PROFILES[profile])
+        paths.append(path)
+    return paths
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    output_dir = sys.argv[1]
+    profile = sys.argv[2] if len(sys.argv) > 2 else "mixed"
+    count = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else 0
+    paths = make_corpus(output_dir, profile, count, seed)
+    total = sum(os.path.getsize(p) for p in paths)
+    print(f"✅ {len(paths)} {profile} documents ({total / 1024 / 1024:.1f} MB) in {output_dir}")
@@ -0,0 +1,137 @@
+import json
+import os
+import time
+
+# Job states, as recorded in the journal
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+def input_signature(input_paths):
+    """Size and mtime of each input, to tell whether a journaled result is still for the same input."""
+    signature = []
+    for path in input_paths:
+        try:
+            stat = os.stat(path)
+            signature.append([stat.st_size, stat.st_mtime_ns])
+        except OSError:
+            signature.append(None)
+    return signature
+
+class BatchJournal:
+    """Per-document state of a batch (pending/done/failed, with the error), kept in output_dir.
+
+    Every state change is appended to the journal as one JSON line in a single write, so a
+    batch that is killed partway (out of memory, a stopped job, a reboot) leaves a record of
+    exactly which documents finished. Running the batch again with the same journal resumes
+    it: documents that are done (and whose inputs, config version and output are unchanged)
+    or that failed are not run again, and retry_failed runs only the ones that failed.
+
+    paths maps each job name to (input_path or list of input paths, output_path).
+    """
+
+    def __init__(self, output_dir, name, version, paths):
+        self.path = os.path.join(output_dir, f".{name}.journal")
+        self.version = version
+        self.paths = paths
+        self.entries = {}
+        self.signatures = {}
+        if os.path.exists(self.path):
+            self.entries = self.load()
+            self.compact()
+        self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def load(self):
+        """Replays the journal; the last line for a document wins."""
+        entries = {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # A line cut short when the batch was killed
+                entries[entry["name"]] = entry
+        return entries
+
+    def compact(self):
+        """Rewrites the journal with one line per document (temp file + rename)."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry in self.entries.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def input_paths(self, name):
+        input_paths = self.paths[name][0]
+        return [input_paths] if isinstance(input_paths, str) else list(input_paths)
+
+    def current_entry(self, name):
+        """The journaled entry for name, or None if it is missing or for other inputs, config or output."""
+        entry = self.entries.get(name)
+        self.signatures[name] = input_signature(self.input_paths(name))
+        if (entry is None or entry["version"] != self.version or entry["inputs"] != self.signatures[name]
+                or entry["state"] == DONE and not os.path.exists(self.paths[name][1])):
+            return None
+        return entry
+
+    def plan(self, jobs, retry_failed=False):
+        """Splits (name, args) jobs into (to_run, done names, failed names, not_run names).
+
+        Normally to_run is everything not done or failed, and failed holds the earlier
+        failures, which are not run again until their input changes. With retry_failed,
+        to_run is only the earlier failures (changed or not), and documents that never
+        ran are left in not_run.
+        """
+        to_run, done, failed, not_run = [], [], [], []
+        for name, args in jobs:
+            entry = self.current_entry(name)
+            state = entry["state"] if entry is not None else None
+            last_state = self.entries[name]["state"] if name in self.entries else None
+            if state == DONE:
+                done.append(name)
+            elif retry_failed and last_state == FAILED:
+                to_run.append((name, args))
+            elif retry_failed:
+                not_run.append(name)
+            elif state == FAILED:
+                failed.append(name)
+            else:
+                to_run.append((name, args))
+        return to_run, done, failed, not_run
+
+    def error(self, name):
+        entry = self.entries.get(name)
+        return entry.get("error") if entry else None
+
+    def write(self, names, state, error=None):
+        lines = []
+        for name in names:
+            entry = {
+                "name": name,
+                "state": state,
+                "error": error,
+                "version": self.version,
+                "inputs": self.signatures.get(name) or input_signature(self.input_paths(name)),
+                "ts": round(time.time(), 3),
+            }
+            self.entries[name] = entry
+            lines.append(json.dumps(entry, ensure_ascii=False) + "\n")
+        data = "".join(lines).encode("utf-8")
+        while data:
+            data = data[os.write(self.fd, data):]
+
+    def start(self, names):
+        """Marks the documents about to run as pending."""
+        self.write(names, PENDING)
+
+    def record(self, name, ok, error=None):
+        self.write([name], DONE if ok else FAILED, None if ok else error or "failed")
+
+    def close(self):
+        os.close(self.fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
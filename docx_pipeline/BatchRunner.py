@@ -0,0 +1,229 @@
+import contextlib
+import io
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from .Instrumentation import BatchMetrics, DocumentMetrics, Instrumentation, collecting
+
+# Journaled for the documents that had not finished when a worker process died
+WORKER_DIED = "BrokenProcessPool: a worker process died (killed, or out of memory) before this document finished"
+
+def list_input_files(input_dir, extensions=(".docx",)):
+    """Splits a directory listing into files to process and skipped files (temp ~$ files and other types)."""
+    to_process = []
+    skipped = []
+    for filename in sorted(os.listdir(input_dir)):
+        if filename.startswith("~$") or not filename.endswith(tuple(extensions)):
+            skipped.append(filename)
+        else:
+            to_process.append(filename)
+    return to_process, skipped
+
+@contextlib.contextmanager
+def atomic_output(path):
+    """Yields a temp path next to path and renames it over path only if the block succeeds,
+    so a crash never leaves a truncated output behind."""
+    tmp_path = path + ".tmp"
+    try:
+        yield tmp_path
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+
+class DocumentTimeout(Exception):
+    """Raised inside a job that runs longer than its DocumentLimits allow."""
+
+class DocumentLimits:
+    """Per-document time and memory limits, enforced inside the process running the job.
+
+    seconds is wall time, via SIGALRM (Unix only). memory_mb caps the worker process's data
+    segment with RLIMIT_DATA (Linux): heap and other private memory, but not the memory-mapped
+    input, so a document that needs more fails with MemoryError instead of getting the whole
+    batch OOM-killed. It is a limit on the worker as a whole, so leave room for what the
+    worker holds before the job starts (imports, a few tens of MB).
+    """
+
+    def __init__(self, seconds=None, memory_mb=None):
+        self.seconds = seconds
+        self.memory_mb = memory_mb
+
+    def __bool__(self):
+        return bool(self.seconds or self.memory_mb)
+
+    @contextlib.contextmanager
+    def applied(self):
+        previous_handler = previous_limit = None
+        if self.seconds:
+            def on_alarm(signum, frame):
+                raise DocumentTimeout(f"took longer than {self.seconds:g} seconds")
+
+            previous_handler = signal.signal(signal.SIGALRM, on_alarm)
+            signal.setitimer(signal.ITIMER_REAL, self.seconds)
+        if self.memory_mb:
+            import resource
+
+            previous_limit = resource.getrlimit(resource.RLIMIT_DATA)
+            limit = self.memory_mb * 1024 * 1024
+            if previous_limit[1] != resource.RLIM_INFINITY:
+                limit = min(limit, previous_limit[1])
+            resource.setrlimit(resource.RLIMIT_DATA, (limit, previous_limit[1]))
+        try:
+            yield
+        finally:
+            if previous_handler is not None:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                signal.signal(signal.SIGALRM, previous_handler)
+            if previous_limit is not None:
+                resource.setrlimit(resource.RLIMIT_DATA, previous_limit)
+
+def run_job(func, name, args, stage=None, instrumentation=None, limits=None):
+    """Runs one job inside a worker, capturing its output so the parent can print it in order.
+
+    A job fails if it raises or returns False; the exception never escapes the worker,
+    so one bad document cannot take down the rest of the batch. limits, if given, is a
+    DocumentLimits. Returns (name, ok, output, error, record), where record holds the
+    job's metrics (see Instrumentation).
+    """
+    stage = stage or func.__name__
+    output = io.StringIO()
+    metrics = DocumentMetrics()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(output), collecting(metrics), \
+                limits.applied() if limits else contextlib.nullcontext():
+            if instrumentation is None:
+                result = func(*args)
+            else:
+                result = instrumentation.call(func, args, stage, name)
+        ok = result is not False
+        record = metrics.record(stage, name, ok, time.perf_counter() - start)
+        return name, ok, output.getvalue(), None, record
+    except Exception as e:
+        record = metrics.record(stage, name, False, time.perf_counter() - start, e)
+        return name, False, output.getvalue(), f"{type(e).__name__}: {e}", record
+
+def run_batch(func, jobs, workers=None, skipped=(), stage=None, instrumentation=None, journal=None,
+              retry_failed=False, limits=None):
+    """Runs func(*args) for every (name, args) job on a process pool and prints progress in input order.
+
+    workers defaults to the number of CPUs; workers=1 runs everything in this process
+    (except with a memory limit, which always needs a worker process of its own).
+    Per-document metrics are logged under stage (default: func's name) as configured by
+    instrumentation (default: the DOCX_* environment variables, see Instrumentation.py).
+    With a BatchJournal, each document's outcome is journaled as soon as it finishes and
+    the batch resumes from the journal (see BatchJournal.plan for retry_failed); the
+    journal is closed when the batch ends.
+    limits is an optional DocumentLimits applied to every job.
+    Returns a summary dict with the succeeded, failed and skipped names.
+    """
+    jobs = list(jobs)
+    summary = {"succeeded": [], "failed": [], "skipped": list(skipped)}
+    if journal is not None:
+        jobs, done, failed, not_run = journal.plan(jobs, retry_failed)
+        summary["succeeded"] += done
+        summary["failed"] += failed
+        summary["skipped"] += not_run
+        print(f"📒 Journal: {len(done)} done, {len(failed)} failed earlier, {len(jobs)} to run"
+              + (f", {len(not_run)} not retried" if not_run else ""))
+        for name in failed:
+            print(f"❌ Failed earlier: {name}: {journal.error(name)}")
+        journal.start(name for name, _ in jobs)
+
+    total = len(jobs)
+    stage = stage or func.__name__
+    instrumentation = instrumentation or Instrumentation.from_env()
+    batch_metrics = BatchMetrics(stage, instrumentation)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    in_process = (workers <= 1 or total <= 1) and not (limits and limits.memory_mb)
+
+    try:
+        if in_process:
+            results = (run_job(func, name, args, stage, instrumentation, limits) for name, args in jobs)
+            report_results(journaled(results, journal), total, summary, batch_metrics)
+        else:
+            with ProcessPoolExecutor(max_workers=max(min(workers, total), 1)) as executor:
+                futures = [executor.submit(run_job, func, name, args, stage, instrumentation, limits)
+                           for name, args in jobs]
+                try:
+                    report_results(in_input_order(futures, journal), total, summary, batch_metrics)
+                except BrokenProcessPool:
+                    reported = set(summary["succeeded"]) | set(summary["failed"])
+                    unfinished = [name for name, _ in jobs if name not in reported]
+                    summary["failed"] += unfinished
+                    if journal is not None:
+                        # Which of them killed the worker is unknown, so a resume skips them all
+                        # and retry_failed (with a memory limit, say) reruns them deliberately
+                        for name in unfinished:
+                            journal.record(name, False, WORKER_DIED)
+                    print(f"❌ A worker process died (killed, or out of memory); {len(unfinished)} documents "
+                          f"did not finish" + ("; journaled as failed, rerun them with retry_failed" if journal else ""))
+    finally:
+        batch_metrics.close(skipped=len(summary["skipped"]))
+        if journal is not None:
+            journal.close()
+
+    print_summary(summary)
+    return summary
+
+def journal_result(journal, result):
+    """Journals a (name, ok, output, error, record) result, with the error of jobs that returned False too."""
+    name, ok, _, error, record = result
+    if not ok and not error and record["error_class"]:
+        error = f"{record['error_class']}: {record['error']}"
+    journal.record(name, ok, error)
+
+def journaled(results, journal):
+    for result in results:
+        if journal is not None:
+            journal_result(journal, result)
+        yield result
+
+def in_input_order(futures, journal=None):
+    """Yields the futures' results in submission order, journaling each one as soon as it finishes.
+
+    If the pool breaks, the results that did finish are still yielded before the error is raised.
+    """
+    position = {future: i for i, future in enumerate(futures)}
+    finished = {}
+    next_position = 0
+    try:
+        for future in as_completed(futures):
+            result = future.result()
+            if journal is not None:
+                journal_result(journal, result)
+            finished[position[future]] = result
+            while next_position in finished:
+                yield finished.pop(next_position)
+                next_position += 1
+    except BrokenProcessPool:
+        for i in sorted(finished):
+            yield finished[i]
+        raise
+
+def report_results(results, total, summary, batch_metrics=None):
+    for count, (name, ok, output, error, record) in enumerate(results, 1):
+        if batch_metrics is not None:
+            batch_metrics.add(record)
+        if output:
+            print(output, end="")
+        if ok:
+            summary["succeeded"].append(name)
+        else:
+            summary["failed"].append(name)
+            if error:
+                print(f"❌ Error processing {name}: {error}")
+        print(f"[{count}/{total}] {'done' if ok else 'failed'}: {name}")
+
+def print_summary(summary):
+    print(f"\nSucceeded: {len(summary['succeeded'])}, "
+          f"Failed: {len(summary['failed'])}, "
+          f"Skipped: {len(summary['skipped'])}")
+    for name in summary["failed"]:
+        print(f"  ❌ {name}")
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """Returns the SHA-256 of a file's contents, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def config_version(*parts):
+    """Turns the rules/config a converter depends on into a short version string."""
+    return hashlib.sha256("\x00".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:16]
+
+class BuildManifest:
+    """On-disk JSON index of what each input was last built into, so unchanged inputs can be skipped.
+
+    Each entry is keyed by the absolute input path and records the input's size, mtime,
+    content hash, the converter's config version, the output path and every file the build
+    wrote (sidecars included, so they are evicted with it). A matching size and
+    mtime is trusted without reading the file; otherwise the content hash decides. A failed
+    build keeps the entry of the last good one, marked with the error, so it is never up to date.
+
+    Call snapshot() on an input before building it: record() stores what the input was when
+    the build started, so an input rewritten during its build is not taken as up to date.
+    """
+
+    def __init__(self, output_dir, name, version):
+        self.path = os.path.join(output_dir, f".{name}.manifest.json")
+        self.version = version
+        self.entries = {}
+        self.hashes = {}  # input key -> (size, mtime_ns, hash) from the last is_up_to_date check
+        self.snapshots = {}  # input key -> signature taken by snapshot(), for record()
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f).get("entries", {})
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Ignoring unreadable manifest {self.path}: {e}")
+
+    def is_up_to_date(self, input_path, output_path):
+        """Checks whether input_path was already built into output_path with the current config."""
+        key = os.path.abspath(input_path)
+        entry = self.entries.get(key)
+        stat = os.stat(input_path)
+
+        if (entry is None or entry.get("error") or entry["version"] != self.version
+                or entry["output"] != os.path.abspath(output_path)
+                or not os.path.exists(output_path)):
+            return False
+
+        if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return True
+
+        # Stat changed (e.g. the file was copied or touched); fall back to the content hash
+        content_hash = file_hash(input_path)
+        self.hashes[key] = (stat.st_size, stat.st_mtime_ns, content_hash)
+        if content_hash != entry["hash"]:
+            return False
+
+        entry["size"] = stat.st_size
+        entry["mtime_ns"] = stat.st_mtime_ns
+        return True
+
+    def signature(self, input_path):
+        """input_path's size, mtime and content hash as it is now."""
+        key = os.path.abspath(input_path)
+        stat = os.stat(input_path)
+        known = self.hashes.pop(key, None)
+        if known is not None and known[:2] == (stat.st_size, stat.st_mtime_ns):
+            content_hash = known[2]
+        else:
+            content_hash = file_hash(input_path)
+            after = os.stat(input_path)
+            if (after.st_size, after.st_mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+                content_hash = None  # Changed while hashing; matches nothing, so it is built again
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": content_hash}
+
+    def snapshot(self, input_path):
+        """Takes input_path's signature just before it is built, for record() to store."""
+        self.snapshots[os.path.abspath(input_path)] = self.signature(input_path)
+
+    def record(self, input_path, output_path, outputs=None):
+        """Records a successful build of input_path; outputs lists every file it wrote (default: output_path).
+
+        The input's signature is the one snapshot() took before the build, if there is one.
+        """
+        key = os.path.abspath(input_path)
+        signature = self.snapshots.pop(key, None) or self.signature(input_path)
+        self.entries[key] = {
+            **signature,
+            "version": self.version,
+            "output": os.path.abspath(output_path),
+            "outputs": [os.path.abspath(path) for path in outputs or [output_path]],
+        }
+
+    def record_failed(self, input_path, error):
+        """Records a failed build of input_path, so it is built again; earlier outputs stay listed for eviction."""
+        key = os.path.abspath(input_path)
+        self.snapshots.pop(key, None)
+        self.entries.setdefault(key, {"output": None, "outputs": []})["error"] = error or "failed"
+
+    def evict_missing(self, input_dir, input_paths):
+        """Deletes outputs (and entries) whose source in input_dir no longer exists."""
+        input_dir = os.path.abspath(input_dir)
+        present = {os.path.abspath(p) for p in input_paths}
+        evicted = []
+
+        for key in list(self.entries):
+            if os.path.dirname(key) != input_dir or key in present:
+                continue
+            entry = self.entries.pop(key)
+            for output_path in entry.get("outputs", [entry["output"]]):
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+                evicted.append(output_path)
+                print(f"🗑️ Removed output of deleted source: {output_path}")
+
+        return evicted
+
+    def save(self):
+        """Writes the manifest atomically (temp file + rename)."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"entries": self.entries}, f, indent=1, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+def incremental_jobs(manifest, input_dir, jobs, paths):
+    """Splits jobs into (to_build, up_to_date names) and evicts outputs of deleted sources.
+
+    paths maps each job name to its (input_path, output_path).
+    """
+    manifest.evict_missing(input_dir, [input_path for input_path, _ in paths.values()])
+
+    to_build = []
+    up_to_date = []
+    for name, args in jobs:
+        input_path, output_path = paths[name]
+        if manifest.is_up_to_date(input_path, output_path):
+            up_to_date.append(name)
+        else:
+            manifest.snapshot(input_path)  # What record_succeeded stores, whatever happens to it during the run
+            to_build.append((name, args))
+    return to_build, up_to_date
+
+def record_succeeded(manifest, summary, paths, outputs=None):
+    """Records every succeeded job from a run_batch summary and saves the manifest.
+
+    outputs optionally maps job names to every file the job wrote, when that is more than its output_path.
+    """
+    for name in summary["succeeded"]:
+        manifest.record(*paths[name], outputs.get(name) if outputs else None)
+    manifest.save()
@@ -1,9 +1,15 @@
+import contextlib
+import io
 import os
 import glob
 import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from docx import Document
 from docxcompose.composer import Composer
 
+from .StreamingMerge import merge_documents_streaming
+
 BASE_DIR = "/Users/km/Documents/Projects/Combine_Word_Docs"
 
 def list_folders(base_path):
@@ -39,7 +45,67 @@ def get_common_prefix(filenames):
         return prefixes.pop()
     return "combined_document"  # Default if no common prefix is found
 
-def combine_word_documents(input_folder, output_folder):
+def merge_documents_composer(word_files, output_file_path):
+    """Appends word_files (in order) onto the first one with docxcompose, with a page break between each."""
+    # Open the first document as the base
+    master_doc = Document(word_files[0])
+    composer = Composer(master_doc)
+    
+    # Append all other documents
+    for file in word_files[1:]:
+        print(f"Adding: {file}")  # Debugging line to see which files are processed
+        doc = Document(file)
+        
+        # Insert a page break before adding the next document
+        master_doc.add_page_break()
+        
+        # Append document after page break
+        composer.append(doc)
+    
+    # Save the final combined document
+    composer.save(output_file_path)
+
+MERGE_ENGINES = {
+    "composer": merge_documents_composer,
+    "streaming": merge_documents_streaming,
+}
+
+def merge_chunk(mode, word_files, output_file_path):
+    """Worker for the merge tree: merges one chunk quietly and returns the intermediate file."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        MERGE_ENGINES[mode](word_files, output_file_path)
+    return output_file_path
+
+def merge_documents_tree(word_files, output_file_path, mode="composer", chunk_size=8, workers=None):
+    """Merges word_files as a tree: chunks of chunk_size are merged in parallel, then the results are merged.
+
+    Chunks are contiguous and their results keep their position, so the sorted order and the
+    page break between every pair of documents come out the same as a sequential merge,
+    while each merge only ever works on chunk_size inputs.
+    """
+    chunk_size = max(chunk_size, 2)
+    level = 0
+
+    with tempfile.TemporaryDirectory(prefix="merge_tree_") as tmp_dir:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while len(word_files) > chunk_size:
+                level += 1
+                chunks = [word_files[i:i + chunk_size] for i in range(0, len(word_files), chunk_size)]
+                outputs = [os.path.join(tmp_dir, f"level{level}_{i:05d}.docx") for i in range(len(chunks))]
+                print(f"Level {level}: merging {len(word_files)} documents in {len(chunks)} chunks")
+
+                word_files = list(executor.map(merge_chunk, [mode] * len(chunks), chunks, outputs))
+
+        print(f"Final merge of {len(word_files)} intermediate documents")
+        MERGE_ENGINES[mode](word_files, output_file_path)
+
+def combine_word_documents(input_folder, output_folder, mode="composer", tree=False, workers=None, chunk_size=8):
+    """Merges every .docx in input_folder (sorted by name) into one document, with a page break between each.
+
+    mode="composer" appends through docxcompose in memory; mode="streaming" writes the body
+    straight to disk so memory stays flat however many documents are merged.
+    tree=True merges chunks of chunk_size documents on a pool of worker processes first.
+    """
     # Ensure output directory exists
     os.makedirs(output_folder, exist_ok=True)
     
@@ -59,28 +125,17 @@ def combine_word_documents(input_folder, output_folder):
     # Determine output filename dynamically
     output_filename = get_common_prefix(word_files) + ".docx"
 
-    # Open the first document as the base
-    master_doc = Document(word_files[0])
-    composer = Composer(master_doc)
-    
-    # Append all other documents
-    for file in word_files[1:]:
-        print(f"Adding: {file}")  # Debugging line to see which files are processed
-        doc = Document(file)
-        
-        # Insert a page break before adding the next document
-        master_doc.add_page_break()
-        
-        # Append document after page break
-        composer.append(doc)
-    
     # Define output file path
     output_file_path = os.path.join(output_folder, output_filename)
-    
-    # Save the final combined document
-    composer.save(output_file_path)
+
+    if tree:
+        merge_documents_tree(word_files, output_file_path, mode, chunk_size=chunk_size, workers=workers)
+    else:
+        MERGE_ENGINES[mode](word_files, output_file_path)
+
     print(f"Merged document saved as: {output_file_path}")
     print(f"Total number of Word documents combined: {len(word_files)}")
+    return output_file_path
 
 if __name__ == "__main__":
     selected_folder = get_user_selected_folder(BASE_DIR)
@@ -0,0 +1,322 @@
+import errno
+import mmap
+import os
+import posixpath
+import struct
+import zipfile
+from lxml import etree
+
+# Size of the fixed part of a zip local file header (see APPNOTE.TXT 4.3.7)
+LOCAL_HEADER_SIZE = 30
+DATA_DESCRIPTOR_FLAG = 0x08
+
+XML_DECLARATION = b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\r\n'
+
+CONTENT_TYPES = "[Content_Types].xml"
+PR_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+CT_NS = "{http://schemas.openxmlformats.org/package/2006/content-types}"
+
+# Relationships a part only needs while its XML mentions their ID (ECMA-376 "explicit"
+# relationships), matched on the last segment of the Type so Strict documents match too.
+# Implicit ones (styles, numbering, theme, fonts, customXml, ...) are always kept, and so
+# is diagramDrawing, which is referenced from the diagram data part rather than the body.
+EXPLICIT_RELATIONSHIP_TYPES = {"image", "hyperlink", "oleObject", "package", "chart", "diagramData",
+                               "diagramLayout", "diagramQuickStyle", "diagramColors", "header", "footer",
+                               "video", "audio", "media", "hdphoto"}
+
+# Every attribute that can hold a relationship ID: r:* (Transitional and Strict) and VML's o:relid
+relationship_ids = etree.XPath(
+    ".//@*[namespace-uri()='http://schemas.openxmlformats.org/officeDocument/2006/relationships'"
+    " or namespace-uri()='http://purl.oclc.org/ooxml/officeDocument/relationships'"
+    " or (namespace-uri()='urn:schemas-microsoft-com:office:office' and local-name()='relid')]")
+
+class MappedFile:
+    """A read-only, seekable file object over a memory-mapped file.
+
+    zipfile reads the central directory and inflates members through the normal file
+    interface, while view() hands out slices of the mapping without copying them.
+    """
+
+    def __init__(self, fileno):
+        self.mapping = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+        self.size = len(self.mapping)
+        self.position = 0
+
+    def seekable(self):
+        return True  # mmap objects only grew seekable() in Python 3.13
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self.position
+        elif whence == os.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise OSError(errno.EINVAL, "Invalid argument")  # What a real file raises, and zipfile expects
+        self.position = offset
+        return offset
+
+    def tell(self):
+        return self.position
+
+    def read(self, size=-1):
+        end = self.size if size is None or size < 0 else min(self.position + size, self.size)
+        data = self.mapping[self.position:end]
+        self.position = max(end, self.position)
+        return data
+
+    def view(self, offset, length):
+        """length bytes from offset, as a memoryview into the mapping."""
+        return memoryview(self.mapping)[offset:offset + length]
+
+    def release(self, offset, length):
+        """Drops the pages of a range this process is done with from its resident set (they
+        stay in the page cache), so copying a large package doesn't count it all as RSS."""
+        if not hasattr(mmap, "MADV_DONTNEED"):
+            return
+        start = offset - offset % mmap.PAGESIZE
+        end = min(offset + length, self.size)
+        if end > start:
+            self.mapping.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+    def close(self):
+        self.mapping.close()
+
+def read_raw_member(src_file, info):
+    """Returns the still-compressed bytes of a zip member straight from the source file
+    (a memoryview into the mapping, without copying, when src_file is a MappedFile)."""
+    src_file.seek(info.header_offset)
+    header = src_file.read(LOCAL_HEADER_SIZE)
+    if header[:4] != zipfile.stringFileHeader:
+        raise zipfile.BadZipFile(f"Bad local header for {info.filename}")
+
+    name_length, extra_length = struct.unpack("<HH", header[26:30])
+    data_offset = info.header_offset + LOCAL_HEADER_SIZE + name_length + extra_length
+    src_file.seek(data_offset)
+    if isinstance(src_file, MappedFile):
+        src_file.seek(info.compress_size, os.SEEK_CUR)  # Leave the position where read() would have
+        return src_file.view(data_offset, info.compress_size)
+    return src_file.read(info.compress_size)
+
+def write_raw_member(zout, info, raw_bytes, filename=None):
+    """Appends already-compressed bytes to an open ZipFile without inflating or deflating them.
+
+    filename stores the member under a new name (used when merging clashing media parts).
+    """
+    new_info = zipfile.ZipInfo(filename or info.filename, info.date_time)
+    new_info.compress_type = info.compress_type
+    new_info.create_system = info.create_system
+    new_info.external_attr = info.external_attr
+    new_info.CRC = info.CRC
+    new_info.compress_size = info.compress_size
+    new_info.file_size = info.file_size
+    # Sizes go in the local header, so a trailing data descriptor is not needed
+    new_info.flag_bits = info.flag_bits & ~DATA_DESCRIPTOR_FLAG
+
+    zout.fp.seek(zout.start_dir)
+    new_info.header_offset = zout.fp.tell()
+    zout.fp.write(new_info.FileHeader())
+    zout.fp.write(raw_bytes)
+
+    zout.start_dir = zout.fp.tell()
+    zout.filelist.append(new_info)
+    zout.NameToInfo[new_info.filename] = new_info
+    zout._didModify = True
+
+def copy_raw_member(src_file, info, zout, filename=None):
+    """Copies one member from a source .docx into zout without re-compressing it."""
+    write_raw_member(zout, info, read_raw_member(src_file, info), filename)
+
+class PackageReader:
+    """An open .docx whose parts are only inflated when asked for.
+
+    The file is memory-mapped, so opening it costs no reads beyond the central directory,
+    and copy_raw() moves untouched parts (media, fonts, customXml) to an output zip as
+    their compressed bytes. source may also be an open file object (e.g. a spooled temp
+    file), which is read through as-is; empty files and files that can't be mapped
+    fall back to normal reads.
+    """
+
+    def __init__(self, source):
+        self.file = None
+        self.mapped = None
+        if hasattr(source, "read"):
+            self.raw = source
+        else:
+            self.file = open(source, "rb")
+            self.raw = self.file
+            try:
+                self.mapped = MappedFile(self.file.fileno())
+                self.raw = self.mapped
+            except (ValueError, OSError):  # Empty file, or a file system without mmap
+                pass
+        try:
+            self.zip = zipfile.ZipFile(self.raw)
+        except Exception:
+            self.close_files()
+            raise
+        self.infos = {info.filename: info for info in self.zip.infolist()}
+
+    def infolist(self):
+        return self.zip.infolist()
+
+    def open(self, part_name):
+        """A stream that inflates the part as it is read."""
+        return self.zip.open(part_name)
+
+    def read(self, part_name):
+        return self.zip.read(part_name)
+
+    def copy_raw(self, info, zout, filename=None):
+        """Copies a part into zout as its compressed bytes, without inflating it."""
+        copy_raw_member(self.raw, info, zout, filename)
+        if self.mapped is not None:
+            self.mapped.release(info.header_offset, self.mapped.position - info.header_offset)
+
+    def close_files(self):
+        if self.mapped is not None:
+            self.mapped.close()
+        if self.file is not None:
+            self.file.close()
+
+    def close(self):
+        self.zip.close()
+        self.close_files()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def rels_part_name(part_name):
+    """word/document.xml -> word/_rels/document.xml.rels"""
+    directory, name = posixpath.split(part_name)
+    return posixpath.join(directory, "_rels", name + ".rels")
+
+def resolve_target(source_part, target):
+    """Resolves a relationship Target relative to the part that owns the relationship."""
+    if target.startswith("/"):
+        return target[1:]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source_part), target))
+
+def part_extension(part_name):
+    """word/media/image1.PNG -> png"""
+    return posixpath.splitext(part_name)[1][1:].lower()
+
+def reachable_parts(names, relationships):
+    """Part names reachable from the package root through internal relationships.
+
+    relationships maps each .rels part name to its parsed root element.
+    """
+    reachable = set()
+    pending = [""]  # The package itself, whose relationships are in _rels/.rels
+    while pending:
+        part_name = pending.pop()
+        rels = relationships.get(rels_part_name(part_name))
+        if rels is None:
+            continue
+        for rel in rels.iter(PR_NS + "Relationship"):
+            if rel.get("TargetMode") == "External":
+                continue
+            target = resolve_target(part_name, rel.get("Target"))
+            if target in names and target not in reachable:
+                reachable.add(target)
+                pending.append(target)
+    return reachable
+
+def compact_package(zin, part_name, referenced_ids):
+    """Works out which parts to drop once part_name has been rewritten to reference only referenced_ids.
+
+    Explicit relationships of part_name whose ID is no longer referenced are removed, then
+    every part that was reachable from the package root before but isn't any more (e.g. an
+    image, or a chart and the workbook embedded in it) is dropped, with its own .rels part,
+    its content-type override, and the extension default if nothing else uses it.
+    Parts that were already unreachable are left alone.
+
+    Returns ({part name: new XML}, {dropped part names}).
+    """
+    names = set(zin.namelist())
+    relationships = {}
+    for name in names:
+        if name.endswith(".rels"):
+            with zin.open(name) as f:
+                relationships[name] = etree.parse(f).getroot()
+
+    own_rels_name = rels_part_name(part_name)
+    own_rels = relationships.get(own_rels_name)
+    if own_rels is None:
+        return {}, set()
+
+    reachable_before = reachable_parts(names, relationships)
+    unreferenced = [rel for rel in own_rels.iter(PR_NS + "Relationship")
+                    if rel.get("Type", "").rsplit("/", 1)[-1] in EXPLICIT_RELATIONSHIP_TYPES
+                    and rel.get("Id") not in referenced_ids]
+    if not unreferenced:
+        return {}, set()
+    for rel in unreferenced:
+        own_rels.remove(rel)
+    rewritten = {own_rels_name: etree.tostring(own_rels, xml_declaration=True, encoding="UTF-8", standalone=True)}
+
+    dropped = reachable_before - reachable_parts(names, relationships)
+    dropped |= {rels_part_name(name) for name in dropped if rels_part_name(name) in names}
+    if dropped and CONTENT_TYPES in names:
+        with zin.open(CONTENT_TYPES) as f:
+            content_types = etree.parse(f).getroot()
+        unused_extensions = {part_extension(name) for name in dropped} - \
+            {part_extension(name) for name in names - dropped}
+        for element in list(content_types):
+            if element.tag == CT_NS + "Override" and element.get("PartName", "").lstrip("/") in dropped:
+                content_types.remove(element)
+            elif element.tag == CT_NS + "Default" and element.get("Extension", "").lower() in unused_extensions:
+                content_types.remove(element)
+        rewritten[CONTENT_TYPES] = etree.tostring(content_types, xml_declaration=True, encoding="UTF-8",
+                                                  standalone=True)
+    return rewritten, dropped
+
+def iter_body_children(source):
+    """Streams document.xml and yields ("root"|"body", element) on their start tags, then
+    ("child", element) as each top-level element finishes parsing.
+
+    A child is removed from the tree once the caller moves on, so only one top-level
+    paragraph or table is held in memory at a time. Root-level siblings of w:body
+    (e.g. w:background) are yielded as "child" too.
+    """
+    root = body = None
+    for event, element in etree.iterparse(source, events=("start", "end"), huge_tree=True):
+        if event == "start":
+            if root is None:
+                root = element
+                yield "root", root
+            elif body is None and element.getparent() is root and etree.QName(element).localname == "body":
+                body = element
+                yield "body", body
+            continue
+
+        parent = element.getparent()
+        if parent is None:
+            break
+        if parent is body or (parent is root and element is not body):
+            yield "child", element
+            parent.remove(element)
+
+def open_tag(element, namespace_declarations):
+    """Serializes just the start tag of element, without the namespaces already declared on the root."""
+    shell = etree.Element(element.tag, dict(element.attrib), nsmap=element.nsmap)
+    shell.text = ""
+    markup = strip_inherited_namespaces(etree.tostring(shell), namespace_declarations)
+    return markup[:markup.rindex(b"</")], markup[markup.rindex(b"</"):]
+
+def strip_inherited_namespaces(markup, namespace_declarations):
+    """lxml re-declares every in-scope namespace on a serialized child; drop the ones the root already has."""
+    end = markup.index(b">")
+    start_tag = markup[:end]
+    for declaration in namespace_declarations:
+        start_tag = start_tag.replace(declaration, b"", 1)
+    return start_tag + markup[end:]
+
+def namespace_declarations_for(nsmap):
+    declarations = []
+    for prefix, uri in nsmap.items():
+        name = "xmlns" if prefix is None else f"xmlns:{prefix}"
+        declarations.append(f' {name}="{uri}"'.encode("utf-8"))
+    return declarations
@@ -0,0 +1,171 @@
+import time
+from lxml import etree
+from docx.styles import BabelFish
+
+from .DocxPackage import PackageReader, iter_body_children
+from .Instrumentation import TimedReader, current_metrics
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+W_P = W_NS + "p"
+W_TBL = W_NS + "tbl"
+W_R = W_NS + "r"
+W_HYPERLINK = W_NS + "hyperlink"
+W_PPR = W_NS + "pPr"
+W_PSTYLE = W_NS + "pStyle"
+W_TR = W_NS + "tr"
+W_TC = W_NS + "tc"
+W_TR_PR = W_NS + "trPr"
+W_TC_PR = W_NS + "tcPr"
+W_GRID_BEFORE = W_NS + "gridBefore"
+W_GRID_SPAN = W_NS + "gridSpan"
+W_VMERGE = W_NS + "vMerge"
+W_T = W_NS + "t"
+W_BR = W_NS + "br"
+W_TYPE = W_NS + "type"
+W_VAL = W_NS + "val"
+W_STYLE = W_NS + "style"
+W_STYLE_ID = W_NS + "styleId"
+W_NAME = W_NS + "name"
+W_DEFAULT = W_NS + "default"
+
+DOCUMENT_PART = "word/document.xml"
+STYLES_PART = "word/styles.xml"
+
+# Run children and the text python-docx's run.text gives them (w:br is handled separately)
+RUN_TEXT = {
+    W_NS + "tab": "\t",
+    W_NS + "ptab": "\t",
+    W_NS + "cr": "\n",
+    W_NS + "noBreakHyphen": "-",
+}
+
+def load_paragraph_styles(docx_zip):
+    """Reads styles.xml once and returns ({style_id: ui_name}, default paragraph style name).
+
+    Names go through python-docx's BabelFish, so built-in styles read "Heading 1" rather
+    than the "heading 1" stored in the file, exactly as paragraph.style.name reports them.
+    """
+    names = {}
+    default_name = "Normal"
+    if STYLES_PART not in docx_zip.namelist():
+        return names, default_name
+
+    with docx_zip.open(STYLES_PART) as f:
+        root = etree.parse(f).getroot()
+
+    for style in root.iter(W_STYLE):
+        if style.get(W_NS + "type") != "paragraph":
+            continue
+        name_el = style.find(W_NAME)
+        name = BabelFish.internal2ui(name_el.get(W_VAL)) if name_el is not None else style.get(W_STYLE_ID)
+        names[style.get(W_STYLE_ID)] = name
+        if style.get(W_DEFAULT) in ("1", "true", "on"):
+            default_name = name
+    return names, default_name
+
+def run_text(run):
+    parts = []
+    for child in run:
+        tag = child.tag
+        if tag == W_T:
+            parts.append(child.text or "")
+        elif tag == W_BR:
+            if child.get(W_TYPE, "textWrapping") == "textWrapping":
+                parts.append("\n")
+        elif tag in RUN_TEXT:
+            parts.append(RUN_TEXT[tag])
+    return "".join(parts)
+
+def paragraph_text(p):
+    """Same text as python-docx's paragraph.text: direct runs plus runs inside hyperlinks."""
+    parts = []
+    for child in p:
+        if child.tag == W_R:
+            parts.append(run_text(child))
+        elif child.tag == W_HYPERLINK:
+            parts.extend(run_text(run) for run in child.iterchildren(W_R))
+    return "".join(parts)
+
+def paragraph_style_id(p):
+    ppr = p.find(W_PPR)
+    if ppr is None:
+        return None
+    pstyle = ppr.find(W_PSTYLE)
+    return None if pstyle is None else pstyle.get(W_VAL)
+
+def cell_text(tc):
+    """Same text as python-docx's cell.text: one line per paragraph directly in the cell."""
+    return "\n".join(paragraph_text(p) for p in tc.iterchildren(W_P))
+
+def property_element(pr, tag):
+    return None if pr is None else pr.find(tag)
+
+def table_rows(tbl):
+    """Returns the table as a list of rows of cell texts, in one pass over w:tr/w:tc.
+
+    Matches python-docx's row.cells without rebuilding the grid per row: a cell spanning
+    n grid columns (gridSpan) appears n times, and a vMerge continuation cell repeats the
+    text of the cell that starts the vertical merge. Empty grid positions before or after
+    a row's cells (gridBefore/gridAfter) are left out, as python-docx does.
+    """
+    rows = []
+    above = {}  # grid column -> text of the cell occupying it in the previous row
+    for tr in tbl.iterchildren(W_TR):
+        row = []
+        grid_before = property_element(tr.find(W_TR_PR), W_GRID_BEFORE)
+        column = 0 if grid_before is None else int(grid_before.get(W_VAL, 0))
+        for tc in tr.iterchildren(W_TC):
+            tc_pr = tc.find(W_TC_PR)
+            grid_span = property_element(tc_pr, W_GRID_SPAN)
+            span = 1 if grid_span is None else int(grid_span.get(W_VAL, 1))
+            vmerge = property_element(tc_pr, W_VMERGE)
+
+            if vmerge is not None and vmerge.get(W_VAL, "continue") == "continue":
+                text = above.get(column, "")
+            else:
+                text = cell_text(tc)
+
+            for offset in range(span):
+                row.append(text)
+                above[column + offset] = text
+            column += span
+        rows.append(row)
+    return rows
+
+def block_item(element, style_names, default_style):
+    """Turns one top-level body element into an iter_block_items item, or None for anything else."""
+    if element.tag == W_P:
+        style_name = style_names.get(paragraph_style_id(element), default_style)
+        return "paragraph", paragraph_text(element), style_name
+    if element.tag == W_TBL:
+        return "table", element
+    return None
+
+def iter_block_items(docx_path):
+    """Yields the body of a .docx in document order, straight from the XML.
+
+    Paragraphs come out as ("paragraph", text, style_name) and tables as ("table", tbl_element).
+    The table element is only valid until the next item is requested.
+    """
+    metrics = current_metrics()
+    with PackageReader(docx_path) as package:
+        docx_zip = package.zip
+        with metrics.phase("styles"):
+            style_names, default_style = load_paragraph_styles(docx_zip)
+
+        inflate_before = metrics.phases.get("inflate", 0.0)
+        busy = 0.0  # Time spent walking, not counting the consumer's time between yields
+        resumed = time.perf_counter()
+        with docx_zip.open(DOCUMENT_PART) as source:
+            for kind, element in iter_body_children(TimedReader(source, metrics)):
+                if kind != "child":
+                    continue
+                item = block_item(element, style_names, default_style)
+                if item is not None:
+                    metrics.count(item[0] + "s")
+                    busy += time.perf_counter() - resumed
+                    yield item
+                    resumed = time.perf_counter()
+
+        busy += time.perf_counter() - resumed
+        metrics.add_time("parse", max(busy - (metrics.phases.get("inflate", 0.0) - inflate_before), 0.0))
@@ -0,0 +1,285 @@
+import contextlib
+import contextvars
+import json
+import os
+import time
+
+# Everything here is off unless configured, either through the arguments below or these
+# environment variables (which reach the batch worker processes too):
+#   DOCX_METRICS_LOG           append one JSON line per document to this file
+#   DOCX_METRICS_PROM_DIR      write a Prometheus textfile per stage into this folder after each batch
+#   DOCX_PROFILE               "cprofile" or "pyinstrument" to profile every document
+#   DOCX_PROFILE_DIR           where profiles are saved (default: current folder)
+#   DOCX_PROFILE_MIN_SECONDS   only keep profiles of documents that took at least this long
+PROFILERS = ("cprofile", "pyinstrument")
+
+class DocumentMetrics:
+    """Phase timings, element counts and byte sizes for one document, filled in by the stage code."""
+
+    def __init__(self):
+        self.phases = {}
+        self.counts = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.error = None
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def count(self, name, n=1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def note_error(self, exc):
+        """For stages that catch their own exceptions and return False instead of raising."""
+        self.error = exc
+
+    def record(self, stage, name, ok, seconds, error=None):
+        """The JSON log entry for this document."""
+        error = error or self.error
+        return {
+            "ts": round(time.time(), 3),
+            "stage": stage,
+            "document": name,
+            "ok": ok,
+            "seconds": round(seconds, 6),
+            "phases": {phase: round(value, 6) for phase, value in self.phases.items()},
+            "counts": self.counts,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "error_class": type(error).__name__ if error is not None else None,
+            "error": str(error) if error is not None else None,
+            "pid": os.getpid(),
+        }
+
+class NullMetrics(DocumentMetrics):
+    """Used outside a batch job, so instrumented code can always call current_metrics()."""
+
+    phases = {}
+    counts = {}
+    bytes_in = 0
+    bytes_out = 0
+    error = None
+
+    def __init__(self):
+        pass
+
+    def phase(self, name):
+        return contextlib.nullcontext()
+
+    def add_time(self, name, seconds):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+    def __setattr__(self, name, value):
+        pass  # Drop bytes_in/bytes_out/error updates too
+
+NULL_METRICS = NullMetrics()
+_current = contextvars.ContextVar("document_metrics", default=NULL_METRICS)
+
+def current_metrics():
+    """The DocumentMetrics of the job running in this process (a no-op one outside run_job)."""
+    return _current.get()
+
+@contextlib.contextmanager
+def collecting(metrics):
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+def file_size(path_or_file):
+    """Size of a path or a seekable file object, 0 if unknown."""
+    try:
+        if hasattr(path_or_file, "seek"):
+            position = path_or_file.tell()
+            size = path_or_file.seek(0, os.SEEK_END)
+            path_or_file.seek(position)
+            return size
+        return os.path.getsize(path_or_file)
+    except (OSError, ValueError, TypeError):
+        return 0
+
+class TimedReader:
+    """Wraps a zip member stream so the time spent inflating it is counted as its own phase."""
+
+    def __init__(self, stream, metrics, phase="inflate"):
+        self.stream = stream
+        self.metrics = metrics
+        self.phase = phase
+
+    def read(self, size=-1):
+        start = time.perf_counter()
+        data = self.stream.read(size)
+        self.metrics.add_time(self.phase, time.perf_counter() - start)
+        return data
+
+class TimedWriter:
+    """Wraps an output zip member stream so the time spent deflating and writing is counted."""
+
+    def __init__(self, stream, metrics, phase="deflate"):
+        self.stream = stream
+        self.metrics = metrics
+        self.phase = phase
+
+    def write(self, data):
+        start = time.perf_counter()
+        result = self.stream.write(data)
+        self.metrics.add_time(self.phase, time.perf_counter() - start)
+        return result
+
+class Instrumentation:
+    """Where per-document metrics go, and whether documents are profiled.
+
+    It is passed to the batch workers along with each job, so it only holds settings.
+    """
+
+    def __init__(self, log_path=None, prometheus_dir=None, profiler=None, profile_dir=".", profile_min_seconds=0.0):
+        if profiler is not None and profiler not in PROFILERS:
+            raise ValueError(f"Unknown profiler {profiler!r}, expected one of {PROFILERS}")
+        self.log_path = log_path
+        self.prometheus_dir = prometheus_dir
+        self.profiler = profiler
+        self.profile_dir = profile_dir
+        self.profile_min_seconds = profile_min_seconds
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            log_path=os.environ.get("DOCX_METRICS_LOG") or None,
+            prometheus_dir=os.environ.get("DOCX_METRICS_PROM_DIR") or None,
+            profiler=os.environ.get("DOCX_PROFILE") or None,
+            profile_dir=os.environ.get("DOCX_PROFILE_DIR") or ".",
+            profile_min_seconds=float(os.environ.get("DOCX_PROFILE_MIN_SECONDS") or 0),
+        )
+
+    def call(self, func, args, stage, name):
+        """Calls func(*args), under the profiler if one is configured."""
+        if self.profiler is None:
+            return func(*args)
+
+        start = time.perf_counter()
+        if self.profiler == "cprofile":
+            import cProfile
+
+            profile = cProfile.Profile()
+            try:
+                return profile.runcall(func, *args)
+            finally:
+                if time.perf_counter() - start >= self.profile_min_seconds:
+                    profile.dump_stats(self.profile_path(stage, name, ".prof"))
+        else:
+            from pyinstrument import Profiler
+
+            profile = Profiler()
+            profile.start()
+            try:
+                return func(*args)
+            finally:
+                profile.stop()
+                if time.perf_counter() - start >= self.profile_min_seconds:
+                    with open(self.profile_path(stage, name, ".html"), "w", encoding="utf-8") as f:
+                        f.write(profile.output_html())
+
+    def profile_path(self, stage, name, extension):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        return os.path.join(self.profile_dir, f"{stage}.{os.path.basename(name)}{extension}")
+
+class BatchMetrics:
+    """Collects the records of one batch in the parent process: logs each one and totals them up."""
+
+    def __init__(self, stage, instrumentation):
+        self.stage = stage
+        self.instrumentation = instrumentation
+        self.start = time.perf_counter()
+        self.documents = {"succeeded": 0, "failed": 0}
+        self.seconds = 0.0
+        self.phases = {}
+        self.counts = {}
+        self.bytes = {"in": 0, "out": 0}
+        self.failures = {}
+        self.log = open(instrumentation.log_path, "a", encoding="utf-8") if instrumentation.log_path else None
+
+    def add(self, record):
+        self.documents["succeeded" if record["ok"] else "failed"] += 1
+        self.seconds += record["seconds"]
+        for phase, seconds in record["phases"].items():
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+        for name, value in record["counts"].items():
+            self.counts[name] = self.counts.get(name, 0) + value
+        self.bytes["in"] += record["bytes_in"]
+        self.bytes["out"] += record["bytes_out"]
+        if not record["ok"]:
+            error_class = record["error_class"] or "ReturnedFalse"
+            self.failures[error_class] = self.failures.get(error_class, 0) + 1
+        if self.log is not None:
+            self.log.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.log.flush()
+
+    def close(self, skipped=0):
+        if self.log is not None:
+            self.log.close()
+        if self.instrumentation.prometheus_dir:
+            self.write_prometheus(skipped)
+
+    def write_prometheus(self, skipped):
+        """Writes this batch's totals for the node_exporter textfile collector (temp file + rename)."""
+        stage = self.stage
+        lines = [
+            "# HELP docx_batch_documents Documents in the last batch, by outcome.",
+            "# TYPE docx_batch_documents gauge",
+        ]
+        for status, value in (*self.documents.items(), ("skipped", skipped)):
+            lines.append(f'docx_batch_documents{{stage="{stage}",status="{status}"}} {value}')
+        lines += [
+            "# HELP docx_batch_duration_seconds Wall time of the last batch.",
+            "# TYPE docx_batch_duration_seconds gauge",
+            f'docx_batch_duration_seconds{{stage="{stage}"}} {time.perf_counter() - self.start:.6f}',
+            "# HELP docx_batch_document_seconds Time spent in documents (summed over workers) in the last batch.",
+            "# TYPE docx_batch_document_seconds gauge",
+            f'docx_batch_document_seconds{{stage="{stage}"}} {self.seconds:.6f}',
+            "# HELP docx_batch_phase_seconds Time spent per phase in the last batch.",
+            "# TYPE docx_batch_phase_seconds gauge",
+        ]
+        lines += [f'docx_batch_phase_seconds{{stage="{stage}",phase="{phase}"}} {seconds:.6f}'
+                  for phase, seconds in sorted(self.phases.items())]
+        lines += [
+            "# HELP docx_batch_bytes Bytes read and written in the last batch.",
+            "# TYPE docx_batch_bytes gauge",
+        ]
+        lines += [f'docx_batch_bytes{{stage="{stage}",direction="{direction}"}} {value}'
+                  for direction, value in self.bytes.items()]
+        lines += [
+            "# HELP docx_batch_elements Elements counted (e.g. removed) in the last batch.",
+            "# TYPE docx_batch_elements gauge",
+        ]
+        lines += [f'docx_batch_elements{{stage="{stage}",kind="{name}"}} {value}'
+                  for name, value in sorted(self.counts.items())]
+        lines += [
+            "# HELP docx_batch_failures Failed documents in the last batch, by exception class.",
+            "# TYPE docx_batch_failures gauge",
+        ]
+        lines += [f'docx_batch_failures{{stage="{stage}",exception="{error_class}"}} {value}'
+                  for error_class, value in sorted(self.failures.items())]
+        lines += [
+            "# HELP docx_batch_last_run_timestamp_seconds When the last batch finished.",
+            "# TYPE docx_batch_last_run_timestamp_seconds gauge",
+            f'docx_batch_last_run_timestamp_seconds{{stage="{stage}"}} {time.time():.3f}',
+        ]
+
+        os.makedirs(self.instrumentation.prometheus_dir, exist_ok=True)
+        path = os.path.join(self.instrumentation.prometheus_dir, f"docx_{stage}.prom")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
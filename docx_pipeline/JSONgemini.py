@@ -0,0 +1,133 @@
+import os
+
+from .BatchJournal import BatchJournal
+from .BatchRunner import list_input_files, run_batch
+from .BuildManifest import BuildManifest, config_version, incremental_jobs, record_succeeded
+from .DocxWalker import iter_block_items
+from .Instrumentation import current_metrics, file_size
+from .JsonOutput import SectionStream, output_extension, output_files
+
+# Bump when the JSON layout changes so the incremental cache rebuilds everything
+CONVERTER_VERSION = 1
+
+def build_sections(items, document_data):
+    """Fills document_data (a list or a SectionStream) from iter_block_items-style items."""
+    current_section = None
+    current_subsection = None
+    current_subsubsection = None
+
+    for item in items:
+        if item[0] != "paragraph":
+            continue  # Tables are not part of this converter's output
+
+        _, text, style_name = item
+        text = text.strip()
+
+        if not text:
+            continue
+
+        if style_name.startswith("Heading 1"):
+            current_section = {"title": text, "content": []}
+            document_data.append(current_section)
+            current_subsection = None
+            current_subsubsection = None
+        elif style_name.startswith("Heading 2"):
+            if current_section is None:
+                current_section = {"title": "Untitled Section", "content": []}
+                document_data.append(current_section)
+
+            current_subsection = {"title": text, "content": []}
+            current_section["content"].append(current_subsection)
+            current_subsubsection = None
+        elif style_name.startswith("Heading 3"):
+            if current_subsection is None:
+                current_subsection = {"title": "Untitled Subsection", "content": []}
+                current_section["content"].append(current_subsection)
+
+            current_subsubsection = {"title": text, "content": []}
+            current_subsection["content"].append(current_subsubsection)
+        elif style_name.startswith("Normal") or style_name.startswith("Body Text"):
+            content_item = {"type": "paragraph", "text": text}
+
+            if current_subsubsection:
+                current_subsubsection["content"].append(content_item)
+            elif current_subsection:
+                current_subsection["content"].append(content_item)
+            elif current_section:
+                current_section["content"].append(content_item)
+            else:
+                if not document_data:
+                    current_section = {"title": "Introduction", "content": []}
+                    document_data.append(current_section)
+                current_section["content"].append(content_item)
+
+def docx_to_json(docx_path, output_path, output_format="pretty"):
+    """Converts a Word document to JSON and saves it.
+
+    output_format is one of JsonOutput.OUTPUT_FORMATS; every format except "pretty"
+    writes each section out as soon as the next one starts.
+    """
+    metrics = current_metrics()
+    try:
+        metrics.bytes_in += file_size(docx_path)
+        with SectionStream(output_path, output_format, source=os.path.basename(docx_path)) as document_data:
+            build_sections(iter_block_items(docx_path), document_data)
+
+        print(f"Conversion successful. JSON output saved to {output_path}")
+        return True
+
+    except FileNotFoundError as e:
+        metrics.note_error(e)
+        print(f"Error: File not found: {docx_path}")
+    except Exception as e:
+        metrics.note_error(e)
+        print(f"An error occurred: {e} while processing {docx_path}")
+    return False
+
+
+def process_directory(input_dir, output_dir, workers=None, incremental=True, output_format="pretty",
+                      journal=False, retry_failed=False, limits=None):
+    """Converts every Word document in input_dir to JSON in output_dir.
+
+    journal, retry_failed and limits work as in StripWordDoc.remove_text_tables_and_images.
+    """
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    # Skip temporary files (~$) and anything that isn't a Word document
+    filenames, skipped = list_input_files(input_dir, extensions=(".docx", ".doc"))
+
+    jobs = []
+    paths = {}
+    for filename in filenames:
+        input_path = os.path.join(input_dir, filename)
+        output_filename = os.path.splitext(filename)[0] + output_extension(output_format)
+        output_path = os.path.join(output_dir, output_filename)
+        paths[filename] = (input_path, output_path)
+        jobs.append((filename, (input_path, output_path, output_format)))
+
+    version = config_version(CONVERTER_VERSION, output_format)
+    batch_journal = BatchJournal(output_dir, "JSONgemini", version, paths) if journal or retry_failed else None
+    options = {"workers": workers, "stage": "json-text", "journal": batch_journal, "retry_failed": retry_failed,
+               "limits": limits}
+
+    if not incremental:
+        return run_batch(docx_to_json, jobs, skipped=skipped, **options)
+
+    # Only reconvert documents that changed since the last run
+    manifest = BuildManifest(output_dir, "JSONgemini", version)
+    jobs, up_to_date = incremental_jobs(manifest, input_dir, jobs, paths)
+    print(f"⏭️ {len(up_to_date)} unchanged, {len(jobs)} to process")
+
+    summary = run_batch(docx_to_json, jobs, skipped=skipped + up_to_date, **options)
+    outputs = {name: output_files(output_path, output_format) for name, (_, output_path) in paths.items()}
+    record_succeeded(manifest, summary, paths, outputs)
+    return summary
+
+
+if __name__ == "__main__":
+    # Example usage:
+    input_directory = "/Users/km/Documents/Convert"
+    output_directory = "/Users/km/Documents/JSON"
+
+    process_directory(input_directory, output_directory)
@@ -0,0 +1,214 @@
+import os
+import re
+
+from .BatchJournal import BatchJournal
+from .BatchRunner import list_input_files, run_batch
+from .BuildManifest import BuildManifest, config_version, incremental_jobs, record_succeeded
+from .DocxWalker import iter_block_items, table_rows
+from .Instrumentation import current_metrics, file_size
+from .JsonOutput import SectionStream, output_extension, output_files
+
+# Bump when the JSON layout changes so the incremental cache rebuilds everything
+CONVERTER_VERSION = 2
+
+# records  - a list of {header: value} dictionaries, one per row
+# columnar - {"headers": [...], "columns": [[...], ...]}, one array per column
+# split    - {"columns": [...], "data": [[...], ...]}, pandas' orient="split" (pd.DataFrame(**table))
+TABLE_LAYOUTS = ("records", "columnar", "split")
+
+def extract_table(table, layout="records"):
+    """Converts a Word table (a w:tbl element) into rows or columns keyed by the first row."""
+    rows = table_rows(table)
+    if len(rows) < 2:
+        return [] if layout == "records" else {}
+
+    headers = [text.strip() for text in rows[0]]
+
+    if layout == "records":
+        return [dict(zip(headers, (text.strip() for text in row))) for row in rows[1:]]  # Skip header row
+
+    # Rows can have fewer or more cells than the header (gridBefore/gridAfter), so square them up
+    width = len(headers)
+    body = [[text.strip() for text in row[:width]] + [""] * (width - len(row)) for row in rows[1:]]
+
+    if layout == "columnar":
+        return {"headers": headers, "columns": [list(column) for column in zip(*body)]}
+    return {"columns": headers, "data": body}
+
+def table_to_dataframe(table_data):
+    """Builds a pandas DataFrame from any table layout (needs pandas installed)."""
+    import pandas as pd
+
+    if isinstance(table_data, list):
+        return pd.DataFrame.from_records(table_data)
+    if "columns" in table_data and "data" in table_data:
+        return pd.DataFrame(data=table_data["data"], columns=table_data["columns"])
+    return pd.DataFrame(dict(zip(table_data["headers"], table_data["columns"])))
+
+def table_to_arrow(table_data):
+    """Builds a pyarrow Table from a columnar table (needs pyarrow installed)."""
+    import pyarrow as pa
+
+    return pa.table(table_data["columns"], names=table_data["headers"])
+
+def is_list_item(text):
+    """Checks if a paragraph is part of a list (manual or Word-style)."""
+    return bool(re.match(r"^(-|\*|•|\d+\.|[a-z]\.)\s+", text))  # Detects "- ", "* ", "• ", "1. ", "a. "
+
+def clean_list_item(text):
+    """Removes list markers like '- ', '• ', '1. ', etc."""
+    return re.sub(r"^(-|\*|•|\d+\.|[a-z]\.)\s+", "", text).strip()
+
+def build_sections(items, document_data, table_layout="records"):
+    """Fills document_data (a list or a SectionStream) from iter_block_items-style items."""
+    current_section = None
+    current_subsection = None
+    current_subsubsection = None
+    current_list = None  # Track list items
+
+    # Walk paragraphs and tables in document order so each table lands in its own section
+    for item in items:
+        if item[0] == "table":
+            current_list = None  # A table ends any list before it
+            with current_metrics().phase("extract_tables"):
+                table_data = extract_table(item[1], table_layout)
+
+            if table_data:
+                table_item = {"type": "table", "data": table_data}
+
+                if current_subsubsection:
+                    current_subsubsection["content"].append(table_item)
+                elif current_subsection:
+                    current_subsection["content"].append(table_item)
+                elif current_section:
+                    current_section["content"].append(table_item)
+                else:
+                    if not document_data:
+                        current_section = {"title": "Introduction", "content": []}
+                        document_data.append(current_section)
+                    current_section["content"].append(table_item)
+            continue
+
+        _, text, style_name = item
+        text = text.strip()
+
+        if not text:
+            continue
+
+        # Handle headings
+        if style_name.startswith("Heading 1"):
+            current_section = {"title": text, "content": []}
+            document_data.append(current_section)
+            current_subsection = None
+            current_subsubsection = None
+            current_list = None  # Reset list tracking
+        elif style_name.startswith("Heading 2"):
+            current_subsection = {"title": text, "content": []}
+            if current_section:
+                current_section["content"].append(current_subsection)
+            current_subsubsection = None
+            current_list = None
+        elif style_name.startswith("Heading 3"):
+            current_subsubsection = {"title": text, "content": []}
+            if current_subsection:
+                current_subsection["content"].append(current_subsubsection)
+            current_list = None
+        # Handle lists
+        elif is_list_item(text):
+            if current_list is None:
+                current_list = {"type": "list", "items": []}
+                if current_subsubsection:
+                    current_subsubsection["content"].append(current_list)
+                elif current_subsection:
+                    current_subsection["content"].append(current_list)
+                elif current_section:
+                    current_section["content"].append(current_list)
+
+            list_item_text = clean_list_item(text)  # Remove bullet points
+            current_list["items"].append({"text": list_item_text})
+        else:  # Normal paragraph
+            if current_list:
+                current_list = None  # End list tracking
+
+            content_item = {"type": "paragraph", "text": text}
+
+            if current_subsubsection:
+                current_subsubsection["content"].append(content_item)
+            elif current_subsection:
+                current_subsection["content"].append(content_item)
+            elif current_section:
+                current_section["content"].append(content_item)
+            else:
+                if not document_data:
+                    current_section = {"title": "Introduction", "content": []}
+                    document_data.append(current_section)
+                current_section["content"].append(content_item)
+
+def docx_to_json(docx_path, output_path, output_format="pretty", table_layout="records"):
+    """Converts a Word document (headings, paragraphs, lists, and tables) to JSON.
+
+    output_format is one of JsonOutput.OUTPUT_FORMATS; every format except "pretty"
+    writes each section out as soon as the next one starts. table_layout is one of
+    TABLE_LAYOUTS and sets the shape of each table's "data".
+    """
+    metrics = current_metrics()
+    try:
+        metrics.bytes_in += file_size(docx_path)
+        with SectionStream(output_path, output_format, source=os.path.basename(docx_path)) as document_data:
+            build_sections(iter_block_items(docx_path), document_data, table_layout)
+
+        print(f"Conversion successful. JSON output saved to {output_path}")
+        return True
+
+    except FileNotFoundError as e:
+        metrics.note_error(e)
+        print(f"Error: File not found: {docx_path}")
+    except Exception as e:
+        metrics.note_error(e)
+        print(f"An error occurred: {e} while processing {docx_path}")
+    return False
+
+def process_directory(input_dir, output_dir, workers=None, incremental=True, output_format="pretty",
+                      table_layout="records", journal=False, retry_failed=False, limits=None):
+    """Processes all .docx files in the input directory and converts them to JSON.
+
+    journal, retry_failed and limits work as in StripWordDoc.remove_text_tables_and_images.
+    """
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    filenames, skipped = list_input_files(input_dir)  # Ignore temporary Word files
+
+    jobs = []
+    paths = {}
+    for filename in filenames:
+        input_path = os.path.join(input_dir, filename)
+        output_filename = os.path.splitext(filename)[0] + output_extension(output_format)
+        output_path = os.path.join(output_dir, output_filename)
+        paths[filename] = (input_path, output_path)
+        jobs.append((filename, (input_path, output_path, output_format, table_layout)))
+
+    version = config_version(CONVERTER_VERSION, output_format, table_layout)
+    batch_journal = BatchJournal(output_dir, "JSONwTable", version, paths) if journal or retry_failed else None
+    options = {"workers": workers, "stage": "json-tables", "journal": batch_journal, "retry_failed": retry_failed,
+               "limits": limits}
+
+    if not incremental:
+        return run_batch(docx_to_json, jobs, skipped=skipped, **options)
+
+    # Only reconvert documents that changed since the last run
+    manifest = BuildManifest(output_dir, "JSONwTable", version)
+    jobs, up_to_date = incremental_jobs(manifest, input_dir, jobs, paths)
+    print(f"⏭️ {len(up_to_date)} unchanged, {len(jobs)} to process")
+
+    summary = run_batch(docx_to_json, jobs, skipped=skipped + up_to_date, **options)
+    outputs = {name: output_files(output_path, output_format) for name, (_, output_path) in paths.items()}
+    record_succeeded(manifest, summary, paths, outputs)
+    return summary
+
+if __name__ == "__main__":
+    # ==== SET YOUR INPUT AND OUTPUT DIRECTORY HERE ====
+    input_directory = "/Users/km/Documents/Combine_Word_Docs/Convert"  # Change this to your input folder
+    output_directory = "/Users/km/Documents/Combine_Word_Docs/JSON"    # Change this to your output folder
+
+    process_directory(input_directory, output_directory)
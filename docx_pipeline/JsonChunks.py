@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+
+from .BatchRunner import atomic_output
+from .JsonOutput import dumps_compact, iter_items
+
+# Bump when the chunk or index layout changes
+CHUNK_FORMAT_VERSION = 1
+DEFAULT_CHUNK_TOKENS = 512
+PATH_SEPARATOR = " > "
+
+_encoding = None
+
+def count_tokens(text):
+    """Tokens in text: exact with tiktoken installed (cl100k_base), otherwise about 4 characters a token."""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:  # Not installed, or the encoding can't be downloaded
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+def table_rows_as_dicts(data):
+    """Rows of a table item in any JSONwTable layout, as {header: value} dicts."""
+    if isinstance(data, list):
+        return data
+    if "data" in data:
+        return [dict(zip(data["columns"], row)) for row in data["data"]]
+    return [dict(zip(data["headers"], row)) for row in zip(*data["columns"])]
+
+def item_units(item):
+    """Splits a content item into the smallest pieces of text a chunk boundary may fall between."""
+    if item.get("type") == "list":
+        return ["- " + entry["text"] for entry in item["items"]]
+    if item.get("type") == "table":
+        return [" | ".join(f"{header}: {value}" for header, value in row.items() if value)
+                for row in table_rows_as_dicts(item["data"])]
+    return [item.get("text", "")]
+
+def split_unit(text, max_tokens):
+    """Cuts a single piece of text that is over max_tokens into pieces on word boundaries."""
+    pieces = []
+    words = []
+    tokens = 0
+    for word in text.split():
+        word_tokens = count_tokens(word + " ")
+        if words and tokens + word_tokens > max_tokens:
+            pieces.append(" ".join(words))
+            words = []
+            tokens = 0
+        words.append(word)
+        tokens += word_tokens
+    if words:
+        pieces.append(" ".join(words))
+    return pieces
+
+def chunk_texts(units, max_tokens):
+    """Packs units, in order, into texts of at most max_tokens (a unit is only split if it alone is too big)."""
+    texts = []
+    current = []
+    tokens = 0
+    for unit in units:
+        unit_tokens = count_tokens(unit)
+        pieces = [(unit, unit_tokens)] if unit_tokens <= max_tokens else \
+            [(piece, count_tokens(piece)) for piece in split_unit(unit, max_tokens)]
+        for piece, piece_tokens in pieces:
+            if current and tokens + piece_tokens > max_tokens:
+                texts.append("\n".join(current))
+                current = []
+                tokens = 0
+            current.append(piece)
+            tokens += piece_tokens + 1  # the newline joining it to the next piece
+    if current:
+        texts.append("\n".join(current))
+    return texts
+
+def index_path_for(output_path):
+    return os.path.splitext(output_path)[0] + ".index.json"
+
+class ChunkWriter:
+    """Writes a document's sections as flat, token-bounded chunks, one JSON line each.
+
+    Chunks never cross a heading, so each carries a single heading path. A chunk's ID is a
+    hash of the source file, its heading path and its text, so chunks of sections that did
+    not change keep their IDs from one run to the next. The sidecar index maps each heading
+    path to its chunk IDs and each chunk ID to the byte offset and length of its line, and
+    lists which IDs were added or removed since the previous index.
+    """
+
+    def __init__(self, file, output_path, source, max_tokens=DEFAULT_CHUNK_TOKENS):
+        self.file = file
+        self.index_path = index_path_for(output_path)
+        self.source = source
+        self.max_tokens = max_tokens
+        self.chunks = {}  # id -> [offset, length]
+        self.headings = {}  # heading path -> [ids]
+        self.sections = {}  # heading path (#n for repeats) -> content hash
+        self.seen_ids = {}
+        self.sequence = 0
+
+    def write_section(self, section):
+        group_path = None
+        group_items = []
+        for item in iter_items(section):
+            path = tuple(item.pop("path"))
+            if path != group_path and group_items:
+                self.write_group(group_path, group_items)
+                group_items = []
+            group_path = path
+            group_items.append(item)
+        if group_items:
+            self.write_group(group_path, group_items)
+
+    def write_group(self, path, items):
+        """Chunks the content directly under one heading path."""
+        heading = PATH_SEPARATOR.join(path)
+        units = [unit for item in items for unit in item_units(item) if unit.strip()]
+        if not units:
+            return
+
+        section_key = heading
+        repeat = 1
+        while section_key in self.sections:
+            repeat += 1
+            section_key = f"{heading}#{repeat}"
+        self.sections[section_key] = hashlib.sha256("\n".join(units).encode("utf-8")).hexdigest()[:16]
+
+        for text in chunk_texts(units, self.max_tokens):
+            base = "\x00".join((self.source or "", section_key, text))
+            duplicate = self.seen_ids.get(base, 0)
+            self.seen_ids[base] = duplicate + 1
+            chunk_id = hashlib.sha256(f"{base}\x00{duplicate}".encode("utf-8")).hexdigest()[:16]
+
+            offset = self.file.tell()
+            line = dumps_compact({
+                "id": chunk_id,
+                "source": self.source,
+                "path": list(path),
+                "heading": heading,
+                "seq": self.sequence,
+                "offset": offset,
+                "tokens": count_tokens(text),
+                "text": text,
+            }) + b"\n"
+            self.file.write(line)
+            self.chunks[chunk_id] = [offset, len(line)]
+            self.headings.setdefault(heading, []).append(chunk_id)
+            self.sequence += 1
+
+    def previous_ids(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return set(json.load(f).get("chunks", {}))
+        except (OSError, ValueError):
+            return None
+
+    def write_index(self):
+        """Writes the sidecar index (temp file + rename), with the changes since the previous one."""
+        previous = self.previous_ids()
+        current = set(self.chunks)
+        index = {
+            "format": CHUNK_FORMAT_VERSION,
+            "source": self.source,
+            "max_tokens": self.max_tokens,
+            "chunks": self.chunks,
+            "headings": self.headings,
+            "sections": self.sections,
+            "changes": {
+                "added": sorted(current - previous) if previous is not None else sorted(current),
+                "removed": sorted(previous - current) if previous is not None else [],
+                "unchanged": len(current & previous) if previous is not None else 0,
+            },
+        }
+        with atomic_output(self.index_path) as tmp_path:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(index, f, ensure_ascii=False)
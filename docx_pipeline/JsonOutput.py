@@ -0,0 +1,137 @@
+import json
+import os
+
+from .Instrumentation import current_metrics
+
+try:
+    import orjson  # Optional: much faster compact serialization when installed
+except ImportError:
+    orjson = None
+
+# pretty           - the original json.dumps(indent=4) file, written once at the end
+# json             - compact JSON array, each top-level section written as soon as it closes
+# ndjson           - one line per content item, with the heading path it sits under
+# ndjson-sections  - one line per top-level section
+# chunks           - token-bounded retrieval chunks, one line each, plus a .index.json sidecar (see JsonChunks.py)
+OUTPUT_FORMATS = ("pretty", "json", "ndjson", "ndjson-sections", "chunks")
+
+def output_extension(output_format):
+    if output_format == "chunks":
+        return ".chunks.ndjson"
+    return ".ndjson" if output_format.startswith("ndjson") else ".json"
+
+def output_files(output_path, output_format):
+    """Every file a conversion to output_path writes: the output itself, plus the chunk index for chunks."""
+    if output_format == "chunks":
+        from .JsonChunks import index_path_for  # JsonChunks imports this module
+
+        return [output_path, index_path_for(output_path)]
+    return [output_path]
+
+def dumps_compact(obj):
+    """Compact UTF-8 JSON bytes, using orjson when it is available."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def iter_items(section, path=()):
+    """Flattens a section tree into content items that carry their heading path."""
+    path = path + (section["title"],)
+    for entry in section["content"]:
+        if "title" in entry and "content" in entry:
+            yield from iter_items(entry, path)
+        else:
+            yield {"path": list(path), **entry}
+
+class SectionStream:
+    """Stands in for the converters' document_data list and writes sections out as they close.
+
+    A top-level section is complete once the next one is appended, so everything but the
+    newest section is flushed and dropped on append. Output goes to a temp file that is
+    only renamed over output_path when the conversion finishes without an error.
+    """
+
+    def __init__(self, output_path, output_format="pretty", source=None, chunk_tokens=None):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format {output_format!r}, expected one of {OUTPUT_FORMATS}")
+        self.output_path = output_path
+        self.output_format = output_format
+        self.tmp_path = output_path + ".tmp"
+        self.pending = []
+        self.count = 0
+        self.written = 0
+        self.file = open(self.tmp_path, "wb")
+        self.chunks = None
+        if output_format == "json":
+            self.file.write(b"[")
+        elif output_format == "chunks":
+            from .JsonChunks import DEFAULT_CHUNK_TOKENS, ChunkWriter  # JsonChunks imports this module
+
+            self.chunks = ChunkWriter(self.file, output_path, source, chunk_tokens or DEFAULT_CHUNK_TOKENS)
+
+    def append(self, section):
+        self.pending.append(section)
+        self.count += 1
+        if self.output_format != "pretty":
+            while len(self.pending) > 1:
+                self.write_section(self.pending.pop(0))
+
+    def __len__(self):
+        return self.count
+
+    def write_section(self, section):
+        with current_metrics().phase("json_write"):
+            self.write_section_now(section)
+
+    def write_section_now(self, section):
+        if self.output_format == "json":
+            if self.written:
+                self.file.write(b",")
+            self.file.write(dumps_compact(section))
+        elif self.output_format == "ndjson-sections":
+            self.file.write(dumps_compact(section) + b"\n")
+        elif self.output_format == "chunks":
+            self.chunks.write_section(section)
+        else:
+            for item in iter_items(section):
+                self.file.write(dumps_compact(item) + b"\n")
+        self.written += 1
+
+    def close(self):
+        """Flushes the remaining sections and moves the finished file into place."""
+        metrics = current_metrics()
+        with metrics.phase("json_write"):
+            if self.output_format == "pretty":
+                self.file.write(json.dumps(self.pending, indent=4, ensure_ascii=False).encode("utf-8"))
+            else:
+                for section in self.pending:
+                    self.write_section_now(section)
+                if self.output_format == "json":
+                    self.file.write(b"]")
+            self.pending = []
+            metrics.bytes_out += self.file.tell()
+            self.file.close()
+            os.replace(self.tmp_path, self.output_path)
+            if self.chunks is not None:
+                self.chunks.write_index()
+        metrics.count("sections", self.count)
+
+    def abort(self):
+        """Discards a partially written output."""
+        self.file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+            return False
+        try:
+            self.close()
+        except BaseException:
+            self.abort()  # e.g. a DocumentTimeout during the final write
+            raise
+        return False
@@ -0,0 +1,267 @@
+import os
+import queue
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from .BatchRunner import atomic_output, print_summary
+from .Instrumentation import BatchMetrics, DocumentMetrics, Instrumentation, file_size
+
+class RendererStartError(RuntimeError):
+    """A renderer could not be started (unoserver or LibreOffice missing, crashing or too slow to come up)."""
+
+def free_ports(count):
+    """Ports nothing is listening on, picked by the OS (bound to port 0, then released)."""
+    sockets = [socket.socket() for _ in range(count)]
+    try:
+        for sock in sockets:
+            sock.bind(("127.0.0.1", 0))
+        return [sock.getsockname()[1] for sock in sockets]
+    finally:
+        for sock in sockets:
+            sock.close()
+
+def port_in_use(port):
+    with socket.socket() as sock:
+        try:
+            sock.bind(("127.0.0.1", port))
+        except OSError:
+            return True
+    return False
+
+class RendererWorker:
+    """One long-lived headless LibreOffice, driven through unoserver over a local socket.
+
+    Each worker gets its own ports and its own LibreOffice profile directory, because
+    soffice refuses to run two instances on the same profile. The ports are free ones
+    picked on every start, so the worker never talks to a unoserver it did not start
+    (one already running on the default port 2003, say); with base_port, worker i uses
+    base_port + 2i and + 2i + 1, and fails to start if either is taken.
+    """
+
+    def __init__(self, index, base_port=None, command="unoserver", startup_timeout=60):
+        self.index = index
+        self.base_port = base_port
+        self.port = None
+        self.uno_port = None
+        self.command = command
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self.profile_dir = None
+        self.jobs_done = 0
+
+    def start(self):
+        if self.base_port is None:
+            self.port, self.uno_port = free_ports(2)
+        else:
+            self.port = self.base_port + 2 * self.index
+            self.uno_port = self.port + 1
+            for port in (self.port, self.uno_port):
+                if port_in_use(port):
+                    raise RendererStartError(f"Port {port} for renderer {self.index} is already in use")
+        self.profile_dir = tempfile.mkdtemp(prefix=f"lo_profile_{self.index}_")
+        try:
+            self.process = subprocess.Popen(
+                [self.command,
+                 "--interface", "127.0.0.1",
+                 "--port", str(self.port),
+                 "--uno-port", str(self.uno_port),
+                 "--user-installation", self.profile_dir],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+        except OSError as e:
+            self.stop()
+            raise RendererStartError(f"Could not run {self.command}: {e.strerror} (is unoserver installed?)") from e
+        self.jobs_done = 0
+
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                code = self.process.returncode
+                self.stop()
+                raise RendererStartError(f"Renderer {self.index} exited during startup (code {code})")
+            try:
+                with socket.create_connection(("127.0.0.1", self.port), timeout=1):
+                    pass
+            except OSError:
+                time.sleep(0.25)
+                continue
+            if self.process.poll() is None:  # Listening, and it is our own server that is
+                return
+        self.stop()
+        raise RendererStartError(f"Renderer {self.index} did not start within {self.startup_timeout}s")
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+        if self.profile_dir:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+            self.profile_dir = None
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+    def convert(self, docx_path, pdf_path):
+        # Imported here so the rest of the scripts work without unoserver installed
+        from unoserver.client import UnoClient
+
+        client = UnoClient(server="127.0.0.1", port=str(self.port))
+        client.convert(inpath=os.path.abspath(docx_path), outpath=os.path.abspath(pdf_path), convert_to="pdf")
+        self.jobs_done += 1
+
+class RendererPool:
+    """A fixed pool of RendererWorkers with bounded concurrency, timeouts and recycling.
+
+    At most `size` documents render at once. A document that exceeds `timeout` seconds
+    has its worker killed and restarted, and every worker is restarted after
+    `max_jobs_per_worker` documents to keep LibreOffice's memory growth in check.
+    A worker that cannot be restarted leaves the pool; once none are left, every
+    conversion fails with RendererStartError.
+    """
+
+    def __init__(self, size=2, timeout=120, max_jobs_per_worker=200, base_port=None, command="unoserver"):
+        self.timeout = timeout
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.workers = [RendererWorker(i, base_port, command) for i in range(size)]
+        self.idle = queue.Queue()
+        # Calls into unoserver block, so each runs on a helper thread we can stop waiting on
+        self.calls = ThreadPoolExecutor(max_workers=size)
+
+    def start(self):
+        """Starts every worker; if one fails, the ones already running are stopped before re-raising."""
+        try:
+            for worker in self.workers:
+                worker.start()
+                self.idle.put(worker)
+        except BaseException:
+            self.close()
+            raise
+        return self
+
+    def next_worker(self):
+        while self.workers:
+            try:
+                return self.idle.get(timeout=1)
+            except queue.Empty:
+                continue  # Check again that some worker is still in the pool
+        raise RendererStartError("No renderers left; none of them could be restarted")
+
+    def restart(self, worker):
+        """Restarts worker; returns False, having taken it out of the pool, if it does not come back."""
+        try:
+            worker.restart()
+            return True
+        except RendererStartError as e:
+            self.workers.remove(worker)
+            print(f"⚠️ Dropped renderer {worker.index}, {len(self.workers)} left: {e}")
+            return False
+
+    def convert(self, docx_path, pdf_path):
+        """Renders one document on the next free worker, raising on failure or timeout."""
+        worker = self.next_worker()
+        alive = True
+        try:
+            future = self.calls.submit(worker.convert, docx_path, pdf_path)
+            try:
+                future.result(timeout=self.timeout)
+            except FutureTimeout:
+                # Killing the renderer also unblocks the helper thread's pending call
+                alive = self.restart(worker)
+                raise TimeoutError(f"Rendering took longer than {self.timeout}s")
+            except Exception:
+                alive = self.restart(worker)
+                raise
+
+            if worker.jobs_done >= self.max_jobs_per_worker:
+                alive = self.restart(worker)
+        finally:
+            if alive:
+                self.idle.put(worker)
+
+    def close(self):
+        for worker in self.workers:
+            worker.stop()
+        self.calls.shutdown(wait=False)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+def is_rendered(docx_path, pdf_path):
+    """True if pdf_path exists and is newer than docx_path."""
+    try:
+        return os.path.getmtime(pdf_path) >= os.path.getmtime(docx_path)
+    except OSError:
+        return False
+
+def render_pdfs(jobs, workers=2, timeout=120, max_jobs_per_worker=200, instrumentation=None, resume=False):
+    """Renders (name, docx_path, pdf_path) jobs on a RendererPool, reporting progress in input order.
+
+    Each PDF is written to a temp file and renamed into place once complete. With resume=True,
+    documents whose PDF is already newer than the .docx (e.g. from a batch that died partway) count
+    as succeeded without rendering them again.
+    Per-document metrics are logged under the "pdf" stage, like BatchRunner.run_batch does.
+    If the renderers cannot be started, every document is reported as failed.
+    Returns a summary dict like BatchRunner.run_batch.
+    """
+    jobs = list(jobs)
+    summary = {"succeeded": [], "failed": [], "skipped": []}
+    if resume:
+        rendered = [name for name, docx_path, pdf_path in jobs if is_rendered(docx_path, pdf_path)]
+        if rendered:
+            print(f"⏭️ {len(rendered)} PDFs already rendered")
+        summary["succeeded"] += rendered
+        rendered = set(rendered)
+        jobs = [job for job in jobs if job[0] not in rendered]
+    if not jobs:
+        print_summary(summary)
+        return summary
+
+    batch_metrics = BatchMetrics("pdf", instrumentation or Instrumentation.from_env())
+    try:
+        with RendererPool(size=min(workers, len(jobs)), timeout=timeout, max_jobs_per_worker=max_jobs_per_worker) as pool:
+            def render(job):
+                name, docx_path, pdf_path = job
+                metrics = DocumentMetrics()
+                metrics.bytes_in = file_size(docx_path)
+                start = time.perf_counter()
+                try:
+                    with metrics.phase("render"), atomic_output(pdf_path) as tmp_path:
+                        pool.convert(docx_path, tmp_path)
+                    metrics.bytes_out = file_size(pdf_path)
+                    return name, None, metrics.record("pdf", name, True, time.perf_counter() - start)
+                except Exception as e:
+                    return name, f"{type(e).__name__}: {e}", metrics.record("pdf", name, False, time.perf_counter() - start, e)
+
+            with ThreadPoolExecutor(max_workers=len(pool.workers)) as executor:
+                for count, (name, error, record) in enumerate(executor.map(render, jobs), 1):
+                    batch_metrics.add(record)
+                    if error is None:
+                        summary["succeeded"].append(name)
+                        print(f"📄 [{count}/{len(jobs)}] Converted to PDF: {name}")
+                    else:
+                        summary["failed"].append(name)
+                        print(f"❌ [{count}/{len(jobs)}] Error converting {name}: {error}")
+    except RendererStartError as e:
+        print(f"❌ Could not start the PDF renderers: {e}")
+        for name, _, _ in jobs:
+            batch_metrics.add(DocumentMetrics().record("pdf", name, False, 0.0, e))
+            summary["failed"].append(name)
+    finally:
+        batch_metrics.close()
+
+    print_summary(summary)
+    return summary
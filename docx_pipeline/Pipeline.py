@@ -0,0 +1,455 @@
+import argparse
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from . import JSONgemini, JSONwTable
+from .BatchJournal import BatchJournal
+from .BatchRunner import DocumentLimits, atomic_output, list_input_files, run_batch, run_job
+from .BuildManifest import BuildManifest, config_version
+from .CombineWordDocs import MERGE_ENGINES, get_common_prefix
+from .DocxWalker import block_item, iter_block_items, load_paragraph_styles
+from .Instrumentation import PROFILERS, BatchMetrics, DocumentMetrics, Instrumentation, current_metrics, file_size
+from .JsonChunks import DEFAULT_CHUNK_TOKENS
+from .JsonOutput import OUTPUT_FORMATS, SectionStream, output_extension, output_files
+from .PdfRenderer import render_pdfs
+from .StripRules import load_rules
+from .StripWordDoc import STRIP_ENGINE_VERSION, format_removed, strip_document
+from .WatchFolder import Debouncer, open_watcher
+
+# Bump when the pipeline's outputs change so watch mode's manifest rebuilds everything
+PIPELINE_VERSION = 1
+
+# Always run in this order; --stages only picks which ones run
+STAGES = ("combine", "strip", "json", "pdf")
+
+# Output folders, named like the folders the individual scripts use
+CONVERT_DIR = "Convert"  # combined document, when it is not stripped
+CLEAN_DIR = "Clean"
+JSON_DIR = "JSON"
+PDF_DIR = "PDFs"
+
+# tables - JSONwTable.py: headings, paragraphs, lists and tables
+# text   - JSONgemini.py: headings and paragraphs only
+JSON_CONVERTERS = ("tables", "text")
+
+# The combined document stays in memory up to this size before spilling to a temp file
+COMBINE_SPOOL_SIZE = 256 * 1024 * 1024
+
+def parse_stages(text):
+    stages = {stage.strip() for stage in text.split(",") if stage.strip()}
+    unknown = stages - set(STAGES)
+    if unknown:
+        raise ValueError(f"Unknown stage(s) {', '.join(sorted(unknown))}, expected some of {', '.join(STAGES)}")
+    return tuple(stage for stage in STAGES if stage in stages)
+
+def build_json(items, json_path, source, settings):
+    """Writes the JSON output for a stream of DocxWalker block items."""
+    with SectionStream(json_path, settings["output_format"], source, settings.get("chunk_tokens")) as document_data:
+        if settings["json_converter"] == "tables":
+            JSONwTable.build_sections(items, document_data, settings["table_layout"])
+        else:
+            JSONgemini.build_sections(items, document_data)
+
+def document_outputs(name, output_dir, stages, settings):
+    """Returns (docx_path or None, json_path, pdf_path) for one pipeline document."""
+    base = os.path.splitext(name)[0]
+    docx_path = None
+    if "strip" in stages:
+        docx_path = os.path.join(output_dir, CLEAN_DIR, base + ".docx")
+    elif "combine" in stages:
+        docx_path = os.path.join(output_dir, CONVERT_DIR, base + ".docx")
+    json_path = os.path.join(output_dir, JSON_DIR, base + output_extension(settings["output_format"]))
+    pdf_path = os.path.join(output_dir, PDF_DIR, base + ".pdf")
+    return docx_path, json_path, pdf_path
+
+def all_outputs(name, output_dir, stages, settings):
+    """Every file the in-memory stages write for one document, for watch mode's manifest."""
+    docx_path, json_path, _ = document_outputs(name, output_dir, stages, settings)
+    paths = [docx_path] if docx_path else []
+    if "json" in stages:
+        paths += output_files(json_path, settings["output_format"])
+    return paths
+
+def primary_output(name, output_dir, stages, settings):
+    """The output whose presence means the document was processed: the .docx if there is one, else the JSON."""
+    docx_path, json_path, _ = document_outputs(name, output_dir, stages, settings)
+    return docx_path or json_path
+
+def pipeline_version(stages, rules, settings):
+    """Everything the outputs depend on, for watch mode's manifest and the batch journal."""
+    parts = [PIPELINE_VERSION, STRIP_ENGINE_VERSION, stages, rules.version if rules else None,
+             settings["json_converter"], settings["output_format"], settings["table_layout"], settings["chunk_tokens"]]
+    if "combine" in stages:
+        parts.append(settings["merge_mode"])
+    return config_version(*parts)
+
+def iter_kept_items(kept, style_names, default_style):
+    """DocxWalker block items for the elements the strip pass kept."""
+    metrics = current_metrics()
+    for element in kept:
+        item = block_item(element, style_names, default_style)
+        if item is not None:
+            metrics.count(item[0] + "s")
+            yield item
+
+def process_document(name, input_paths, output_dir, stages, rules, settings):
+    """Batch worker: runs the in-memory stages (combine, strip, json) for one output document.
+
+    The combined document is merged into a spooled temp file and read from there, and stripping
+    hands every kept body element straight to the JSON converter, so document.xml is parsed once
+    and each output file is written once. PDF rendering happens afterwards on the renderer pool.
+    """
+    docx_path, json_path, _ = document_outputs(name, output_dir, stages, settings)
+    metrics = current_metrics()
+    bytes_in = metrics.bytes_in + sum(file_size(path) for path in input_paths)
+
+    with tempfile.SpooledTemporaryFile(max_size=COMBINE_SPOOL_SIZE) as combined:
+        if "combine" in stages:
+            with metrics.phase("combine"):
+                MERGE_ENGINES[settings["merge_mode"]](input_paths, combined)
+            source = combined
+            print(f"📄 Combined {len(input_paths)} documents into {name}")
+        else:
+            source = input_paths[0]
+
+        if "strip" in stages:
+            def consume_body(zin, kept):
+                if "json" in stages:
+                    with metrics.phase("styles"):
+                        style_names, default_style = load_paragraph_styles(zin)
+                    build_json(iter_kept_items(kept, style_names, default_style), json_path, name, settings)
+
+            removed = strip_document(source, docx_path, rules, consume_body)
+            print(f"✅ Processed: {name} ({format_removed(removed)})")
+        else:
+            if "json" in stages:
+                build_json(iter_block_items(source), json_path, name, settings)
+            if docx_path is not None:
+                combined.seek(0)
+                with metrics.phase("save"), atomic_output(docx_path) as tmp_path, open(tmp_path, "wb") as f:
+                    shutil.copyfileobj(combined, f)
+                metrics.bytes_out += file_size(docx_path)
+
+    # Bytes in are this document's inputs, not the intermediate combined document
+    metrics.bytes_in = bytes_in
+    if "json" in stages:
+        print(f"Conversion successful. JSON output saved to {json_path}")
+
+def run_pipeline(input_dir, output_dir, stages=STAGES, rules_path=None, merge_mode="streaming",
+                 json_converter="tables", output_format="pretty", table_layout="records", workers=None,
+                 pdf_workers=2, pdf_timeout=120, instrumentation=None, chunk_tokens=None, journal=False,
+                 retry_failed=False, limits=None):
+    """Runs the selected stages over every .docx in input_dir and returns a BatchRunner-style summary.
+
+    With "combine", all documents (sorted by name) become one output document; otherwise
+    each document goes through the remaining stages on its own, on a pool of worker processes.
+    journal=True records each document's outcome in output_dir so a batch that dies partway
+    resumes where it stopped, and retry_failed=True reruns only the documents that failed
+    (see BatchJournal). limits is an optional BatchRunner.DocumentLimits for the documents'
+    combine/strip/json work; PDFs have pdf_timeout.
+    """
+    settings = {
+        "merge_mode": merge_mode,
+        "json_converter": json_converter,
+        "output_format": output_format,
+        "table_layout": table_layout,
+        "chunk_tokens": chunk_tokens,
+    }
+    rules = load_rules(rules_path) if "strip" in stages else None
+
+    filenames, skipped = list_input_files(input_dir)  # Skip temporary or non-Word files
+    if not filenames:
+        print("No valid Word documents found in the folder.")
+        return {"succeeded": [], "failed": [], "skipped": skipped}
+
+    for stage, folder in (("json", JSON_DIR), ("pdf", PDF_DIR)):
+        if stage in stages:
+            os.makedirs(os.path.join(output_dir, folder), exist_ok=True)
+    if "strip" in stages:
+        os.makedirs(os.path.join(output_dir, CLEAN_DIR), exist_ok=True)
+    elif "combine" in stages:
+        os.makedirs(os.path.join(output_dir, CONVERT_DIR), exist_ok=True)
+
+    input_paths = [os.path.join(input_dir, filename) for filename in filenames]
+    if "combine" in stages:
+        name = get_common_prefix(input_paths) + ".docx"
+        jobs = [(name, (name, input_paths, output_dir, stages, rules, settings))]
+        sources = {name: input_paths}
+    else:
+        jobs = [(filename, (filename, [path], output_dir, stages, rules, settings))
+                for filename, path in zip(filenames, input_paths)]
+        sources = {filename: [path] for filename, path in zip(filenames, input_paths)}
+
+    batch_journal = None
+    if journal or retry_failed:
+        paths = {name: (sources[name], primary_output(name, output_dir, stages, settings)) for name, _ in jobs}
+        batch_journal = BatchJournal(output_dir, "Pipeline", pipeline_version(stages, rules, settings), paths)
+    summary = run_batch(process_document, jobs, workers=workers, skipped=skipped, stage="pipeline",
+                        instrumentation=instrumentation, journal=batch_journal, retry_failed=retry_failed,
+                        limits=limits)
+    if "pdf" not in stages:
+        return summary
+
+    pdf_jobs = []
+    for name in summary["succeeded"]:
+        docx_path, _, pdf_path = document_outputs(name, output_dir, stages, settings)
+        pdf_jobs.append((name, docx_path or sources[name][0], pdf_path))
+    pdf_summary = render_pdfs(pdf_jobs, workers=pdf_workers, timeout=pdf_timeout, instrumentation=instrumentation,
+                              resume=batch_journal is not None)
+
+    # Documents that failed an earlier stage never reached the PDF stage; count them as failed overall
+    pdf_summary["failed"][:0] = summary["failed"]
+    pdf_summary["skipped"] = summary["skipped"]
+    return pdf_summary
+
+def warm_up():
+    """Worker initializer. Unpickling it imports this module, so python-docx, lxml and the
+    converters are loaded once when each worker starts rather than with the first document.
+    Workers ignore Ctrl+C so the documents they are working on can finish."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def start_watch_pool(workers):
+    """A pool of workers for watch mode, started and warmed up before the first document arrives."""
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=warm_up)
+    wait([executor.submit(warm_up) for _ in range(workers)])
+    return executor
+
+def watch_pipeline(input_dir, output_dir, stages=("strip", "json"), rules_path=None, json_converter="tables",
+                   output_format="pretty", table_layout="records", workers=2, settle=0.25, polling=False,
+                   poll_interval=0.5, instrumentation=None, chunk_tokens=None, limits=None, give_up=60.0):
+    """Service mode: keeps running and strips/converts each document as soon as it lands in input_dir.
+
+    Changes are picked up through inotify (or polling), debounced until the file is complete
+    (a half-copied .docx waits up to give_up seconds for the rest of it), and handed to a
+    pool of warm worker processes, at most two per worker at a time.
+    A manifest in output_dir skips documents that are already up to date, so a restart
+    only catches up on what changed while the service was down. limits is an optional
+    BatchRunner.DocumentLimits for each document. If a worker dies (killed, out of memory),
+    the documents it had in flight are marked failed and a fresh pool takes over. Stop it with Ctrl+C.
+    """
+    settings = {
+        "merge_mode": None,
+        "json_converter": json_converter,
+        "output_format": output_format,
+        "table_layout": table_layout,
+        "chunk_tokens": chunk_tokens,
+    }
+    rules = load_rules(rules_path) if "strip" in stages else None
+    for stage, folder in (("strip", CLEAN_DIR), ("json", JSON_DIR)):
+        if stage in stages:
+            os.makedirs(os.path.join(output_dir, folder), exist_ok=True)
+
+    manifest = BuildManifest(output_dir, "Pipeline", pipeline_version(stages, rules, settings))
+
+    instrumentation = instrumentation or Instrumentation.from_env()
+    batch_metrics = BatchMetrics("watch", instrumentation)
+    debouncer = Debouncer(input_dir, settle, give_up=give_up)
+    watcher = open_watcher(input_dir, polling, poll_interval)
+    filenames, _ = list_input_files(input_dir)
+    debouncer.touch(filenames, 0)  # Catch up on anything that changed while we were not running
+
+    def failed(name, error):
+        """A document that failed: logged, and marked in the manifest so it is built again."""
+        batch_metrics.add(DocumentMetrics().record("watch", name, False, 0.0, error))
+        manifest.record_failed(os.path.join(input_dir, name), f"{type(error).__name__}: {error}")
+        manifest.save()
+        print(f"❌ Error processing {name}: {type(error).__name__}: {error}")
+
+    def worker_died(error):
+        """The pool is broken (a worker was killed, ran out of memory or crashed): fail what was running."""
+        print(f"❌ A worker process died (killed, or out of memory); {len(running)} documents did not finish")
+        for name in running.values():
+            failed(name, error)
+        running.clear()
+        executor.shutdown(wait=False, cancel_futures=True)
+        print("🔄 Restarting the worker pool")
+        return start_watch_pool(workers)
+
+    queued = []
+    running = {}  # future -> name
+    max_running = 2 * workers
+    executor = start_watch_pool(workers)
+    print(f"👀 Watching {input_dir} ({'+'.join(stages)}), press Ctrl+C to stop")
+    try:
+        while True:
+            now = time.monotonic()
+            ready, removed = debouncer.ready(now)
+            if removed:
+                manifest.evict_missing(input_dir, [os.path.join(input_dir, f) for f in list_input_files(input_dir)[0]])
+                manifest.save()
+            for name in ready:
+                input_path = os.path.join(input_dir, name)
+                if name in queued or name in running.values():
+                    debouncer.touch([name], now)  # Changed again while queued; look again once that run ends
+                elif manifest.is_up_to_date(input_path, primary_output(name, output_dir, stages, settings)):
+                    print(f"⏭️ Unchanged: {name}")
+                else:
+                    queued.append(name)
+
+            while queued and len(running) < max_running:
+                name = queued[0]
+                input_path = os.path.join(input_dir, name)
+                try:
+                    manifest.snapshot(input_path)  # Recorded if this run succeeds, even if the file changes meanwhile
+                except OSError:
+                    queued.pop(0)  # Deleted again since it was queued; the watcher reports that
+                    continue
+                args = (name, [input_path], output_dir, stages, rules, settings)
+                try:
+                    future = executor.submit(run_job, process_document, name, args, "watch", instrumentation, limits)
+                except BrokenProcessPool as e:
+                    executor = worker_died(e)  # name stays queued for the new pool
+                    break
+                queued.pop(0)
+                running[future] = name
+
+            for future in [future for future in running if future.done()]:
+                if future not in running:
+                    continue  # Already failed along with a broken pool
+                try:
+                    name, ok, output, error, record = future.result()
+                except BrokenProcessPool as e:
+                    executor = worker_died(e)
+                    continue
+                del running[future]
+                batch_metrics.add(record)
+                if instrumentation.prometheus_dir:
+                    batch_metrics.write_prometheus(skipped=0)  # Totals since the service started
+                if output:
+                    print(output, end="")
+                if ok:
+                    manifest.record(os.path.join(input_dir, name), primary_output(name, output_dir, stages, settings),
+                                    all_outputs(name, output_dir, stages, settings))
+                    manifest.save()
+                else:
+                    manifest.record_failed(os.path.join(input_dir, name), error)
+                    manifest.save()
+                    print(f"❌ Error processing {name}: {error}")
+
+            # Sleep until the next file event, debounce deadline or finished job
+            deadline = debouncer.next_deadline()
+            timeout = 1.0 if deadline is None else max(0.0, deadline - time.monotonic())
+            if running:
+                timeout = min(timeout, 0.05)
+            debouncer.touch(watcher.changes(timeout), time.monotonic())
+    except KeyboardInterrupt:
+        print("\nStopping; waiting for documents in progress")
+    finally:
+        watcher.close()
+        for future, name in running.items():
+            try:
+                batch_metrics.add(future.result()[4])
+            except BrokenProcessPool as e:
+                failed(name, e)
+        executor.shutdown()
+        batch_metrics.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="docx-pipeline",
+        description="Combine, strip and convert Word documents to JSON and PDF in one run.",
+    )
+    parser.add_argument("input_dir", help="folder of .docx files")
+    parser.add_argument("output_dir", help=f"folder for the {CONVERT_DIR}/, {CLEAN_DIR}/, {JSON_DIR}/ and {PDF_DIR}/ outputs")
+    parser.add_argument("--stages", default="strip,json",
+                        help=f"comma-separated stages to run, always in the order {','.join(STAGES)} (default: strip,json)")
+    parser.add_argument("--rules", help="strip rule file (default: strip_rules.toml)")
+    parser.add_argument("--merge-mode", choices=sorted(MERGE_ENGINES), default="streaming")
+    parser.add_argument("--json-converter", choices=JSON_CONVERTERS, default="tables")
+    parser.add_argument("--json-format", choices=OUTPUT_FORMATS, default="pretty")
+    parser.add_argument("--table-layout", choices=JSONwTable.TABLE_LAYOUTS, default="records")
+    parser.add_argument("--chunk-tokens", type=int, default=DEFAULT_CHUNK_TOKENS,
+                        help=f"token limit per chunk with --json-format chunks (default: {DEFAULT_CHUNK_TOKENS})")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--pdf-workers", type=int, default=2, help="LibreOffice renderers (default: 2)")
+    parser.add_argument("--pdf-timeout", type=int, default=120, help="seconds per PDF (default: 120)")
+    parser.add_argument("--journal", action="store_true",
+                        help="record each document's outcome in OUTPUT_DIR/.Pipeline.journal and resume from it, "
+                             "so a run that dies partway continues where it stopped")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="only rerun the documents the journal has as failed (implies --journal)")
+    parser.add_argument("--timeout", type=float, help="seconds each document may take (not counting its PDF)")
+    parser.add_argument("--memory-limit", type=int, metavar="MB",
+                        help="memory each worker process may use; a document that needs more fails with MemoryError")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and process documents as they arrive (strip and json stages only)")
+    parser.add_argument("--settle", type=float, default=0.25,
+                        help="seconds a new file must stay unchanged before --watch processes it (default: 0.25)")
+    parser.add_argument("--give-up", type=float, default=60.0,
+                        help="seconds --watch waits for an incomplete .docx to change before processing it anyway (default: 60)")
+    parser.add_argument("--poll", action="store_true", help="with --watch, poll the folder instead of using inotify")
+    parser.add_argument("--metrics-log", help="append per-document metrics as JSON lines to this file")
+    parser.add_argument("--prometheus-dir", help="write Prometheus textfile metrics into this folder")
+    parser.add_argument("--profile", choices=PROFILERS, help="profile each document with cProfile or pyinstrument")
+    parser.add_argument("--profile-dir", default="profiles", help="where --profile saves profiles (default: profiles)")
+    parser.add_argument("--profile-min-seconds", type=float, default=0.0,
+                        help="only keep profiles of documents that took at least this long")
+    args = parser.parse_args(argv)
+
+    try:
+        stages = parse_stages(args.stages)
+    except ValueError as e:
+        parser.error(str(e))
+    if not stages:
+        parser.error("no stages selected")
+
+    # Flags override the DOCX_* environment variables
+    instrumentation = Instrumentation.from_env()
+    if args.metrics_log:
+        instrumentation.log_path = args.metrics_log
+    if args.prometheus_dir:
+        instrumentation.prometheus_dir = args.prometheus_dir
+    if args.profile:
+        instrumentation.profiler = args.profile
+        instrumentation.profile_dir = args.profile_dir
+        instrumentation.profile_min_seconds = args.profile_min_seconds
+
+    limits = DocumentLimits(args.timeout, args.memory_limit)
+
+    if args.watch:
+        if "combine" in stages or "pdf" in stages:
+            parser.error("--watch only runs the strip and json stages")
+        if args.journal or args.retry_failed:
+            parser.error("--watch keeps its own manifest; --journal and --retry-failed are for batch runs")
+        watch_pipeline(
+            args.input_dir, args.output_dir, stages,
+            rules_path=args.rules,
+            json_converter=args.json_converter,
+            output_format=args.json_format,
+            table_layout=args.table_layout,
+            workers=args.workers or 2,
+            settle=args.settle,
+            give_up=args.give_up,
+            polling=args.poll,
+            instrumentation=instrumentation,
+            chunk_tokens=args.chunk_tokens,
+            limits=limits,
+        )
+        return 0
+
+    summary = run_pipeline(
+        args.input_dir, args.output_dir, stages,
+        rules_path=args.rules,
+        merge_mode=args.merge_mode,
+        json_converter=args.json_converter,
+        output_format=args.json_format,
+        table_layout=args.table_layout,
+        workers=args.workers,
+        pdf_workers=args.pdf_workers,
+        pdf_timeout=args.pdf_timeout,
+        instrumentation=instrumentation,
+        chunk_tokens=args.chunk_tokens,
+        journal=args.journal,
+        retry_failed=args.retry_failed,
+        limits=limits,
+    )
+    return 1 if summary["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,416 @@
+import copy
+import os
+import posixpath
+import shutil
+import tempfile
+import zipfile
+from lxml import etree
+
+from .DocxPackage import (XML_DECLARATION, PackageReader, iter_body_children, namespace_declarations_for,
+                         open_tag, rels_part_name, resolve_target, strip_inherited_namespaces)
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+R_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PR_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+CT_NS = "{http://schemas.openxmlformats.org/package/2006/content-types}"
+WP_DOCPR = "{http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing}docPr"
+
+W_VAL = W_NS + "val"
+W_STYLE = W_NS + "style"
+W_STYLE_ID = W_NS + "styleId"
+W_NUM = W_NS + "num"
+W_NUM_ID = W_NS + "numId"
+W_ABSTRACT_NUM = W_NS + "abstractNum"
+W_ABSTRACT_NUM_ID = W_NS + "abstractNumId"
+W_SECT_PR = W_NS + "sectPr"
+STYLE_REF_TAGS = {W_NS + "pStyle", W_NS + "rStyle", W_NS + "tblStyle"}
+STYLE_CHAIN_TAGS = (W_NS + "basedOn", W_NS + "next", W_NS + "link")
+# Notes and comments live in package-level parts that this merge does not carry over
+NOTE_TAGS = {W_NS + "footnoteReference", W_NS + "endnoteReference", W_NS + "commentReference",
+             W_NS + "commentRangeStart", W_NS + "commentRangeEnd"}
+
+DOCUMENT_PART = "word/document.xml"
+DOCUMENT_RELS = "word/_rels/document.xml.rels"
+STYLES_PART = "word/styles.xml"
+NUMBERING_PART = "word/numbering.xml"
+CONTENT_TYPES = "[Content_Types].xml"
+REWRITTEN_PARTS = {DOCUMENT_PART, DOCUMENT_RELS, STYLES_PART, NUMBERING_PART, CONTENT_TYPES}
+
+NUMBERING_REL_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/numbering"
+NUMBERING_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.numbering+xml"
+
+PAGE_BREAK = b'<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+
+class SourcePackage:
+    """The parts of one input .docx needed while its body is streamed into the merge."""
+
+    def __init__(self, path):
+        self.path = path
+        self.package = PackageReader(path)
+        self.zip = self.package.zip
+        self.infos = self.package.infos
+
+        content_types = self.read_xml(CONTENT_TYPES)
+        self.defaults = {el.get("Extension").lower(): el.get("ContentType") for el in content_types.iter(CT_NS + "Default")}
+        self.overrides = {el.get("PartName").lstrip("/"): el.get("ContentType") for el in content_types.iter(CT_NS + "Override")}
+
+        self.rels = {}
+        rels = self.read_xml(DOCUMENT_RELS)
+        if rels is not None:
+            self.rels = {rel.get("Id"): rel for rel in rels.iter(PR_NS + "Relationship")}
+
+        # Per-document remapping tables; discarded once the document is appended
+        self.rid_map = {}
+        self.num_map = {}
+        self.abstract_map = {}
+        self.copied_parts = {}
+        self._styles = None
+        self._numbering = None
+
+    def read_xml(self, part_name):
+        if part_name not in self.infos:
+            return None
+        with self.zip.open(part_name) as f:
+            return etree.parse(f, etree.XMLParser(huge_tree=True)).getroot()
+
+    @property
+    def styles(self):
+        if self._styles is None:
+            root = self.read_xml(STYLES_PART)
+            self._styles = {} if root is None else {s.get(W_STYLE_ID): s for s in root.iter(W_STYLE)}
+        return self._styles
+
+    @property
+    def numbering(self):
+        if self._numbering is None:
+            root = self.read_xml(NUMBERING_PART)
+            self._numbering = ({}, {})
+            if root is not None:
+                self._numbering = ({n.get(W_NUM_ID): n for n in root.iter(W_NUM)},
+                                   {a.get(W_ABSTRACT_NUM_ID): a for a in root.iter(W_ABSTRACT_NUM)})
+        return self._numbering
+
+    def content_type(self, part_name):
+        if part_name in self.overrides:
+            return "Override", self.overrides[part_name]
+        return "Default", self.defaults.get(posixpath.splitext(part_name)[1][1:].lower())
+
+    def close(self):
+        self.package.close()
+
+class StreamingMerger:
+    """Merges .docx files into one output, writing each body element out as soon as it is parsed.
+
+    Only what deduplication needs is held in memory: the merged style IDs and definitions,
+    the numbering and relationship ID counters, and the set of part names already used.
+    The body, new relationships and new numbering definitions are spooled to temporary
+    files and every media part is copied as raw compressed bytes, so peak memory does
+    not grow with the number of documents merged.
+    """
+
+    def __init__(self, base_path, output_path):
+        self.output_path = output_path
+        self.zout = zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED)
+        self.body = tempfile.TemporaryFile()
+        self.new_rels = tempfile.TemporaryFile()
+        self.new_abstract_nums = tempfile.TemporaryFile()
+        self.new_nums = tempfile.TemporaryFile()
+        self.dropped_notes = 0
+
+        base = SourcePackage(base_path)
+        try:
+            self.start(base)
+        finally:
+            base.close()
+
+    def start(self, base):
+        """Takes the package-level parts from the base document and streams its body."""
+        self.used_names = set(base.infos)
+        for info in base.infos.values():
+            if info.filename not in REWRITTEN_PARTS:
+                base.package.copy_raw(info, self.zout)
+
+        self.content_types = base.read_xml(CONTENT_TYPES)
+        self.defaults = set(base.defaults)
+
+        self.rels_root = base.read_xml(DOCUMENT_RELS)
+        self.rels_declarations = namespace_declarations_for(self.rels_root.nsmap)
+        self.rel_ids = set(base.rels)
+        self.next_rid = 1
+
+        self.styles_root = base.read_xml(STYLES_PART)
+        self.style_ids = set(base.styles)
+
+        self.numbering_root = base.read_xml(NUMBERING_PART)
+        nums, abstract_nums = base.numbering
+        self.next_num_id = max((int(n) for n in nums), default=0) + 1
+        self.next_abstract_id = max((int(a) for a in abstract_nums), default=-1) + 1
+        base._numbering = None
+
+        self.next_docpr_id = 1
+        self.final_sect_pr = None
+
+        with base.zip.open(DOCUMENT_PART) as source:
+            for kind, element in iter_body_children(source):
+                if kind == "root":
+                    self.body.write(XML_DECLARATION)
+                    head, tail = open_tag(element, [])
+                    self.namespace_declarations = namespace_declarations_for(element.nsmap)
+                    self.body.write(head)
+                    self.closing_tags = [tail]
+                elif kind == "body":
+                    head, tail = open_tag(element, self.namespace_declarations)
+                    self.body.write(head)
+                    self.closing_tags.append(tail)
+                elif element.tag == W_SECT_PR:
+                    self.final_sect_pr = etree.tostring(element)
+                else:
+                    for docpr in element.iter(WP_DOCPR):
+                        self.next_docpr_id = max(self.next_docpr_id, int(docpr.get("id", 0)) + 1)
+                    self.write_element(element)
+
+    def write_element(self, element):
+        self.body.write(strip_inherited_namespaces(etree.tostring(element), self.namespace_declarations))
+
+    def append(self, path, page_break=True):
+        """Streams the body of another document onto the end of the merge."""
+        source = SourcePackage(path)
+        try:
+            if page_break:
+                self.body.write(PAGE_BREAK)
+            dropped_notes = 0
+            with source.zip.open(DOCUMENT_PART) as document:
+                for kind, element in iter_body_children(document):
+                    if kind != "child" or element.tag == W_SECT_PR:
+                        continue
+                    dropped_notes += self.remap(source, element)
+                    self.write_element(element)
+            if dropped_notes:
+                print(f"⚠️ Dropped {dropped_notes} footnote/comment references from {os.path.basename(path)}")
+                self.dropped_notes += dropped_notes
+        finally:
+            source.close()
+
+    def remap(self, source, element):
+        """Rewrites relationship, style, numbering and drawing IDs in element to the merged package's."""
+        notes = []
+        for el in element.iter(etree.Element):
+            tag = el.tag
+            if tag in STYLE_REF_TAGS:
+                self.ensure_style(source, el.get(W_VAL))
+            elif tag == W_NUM_ID:
+                el.set(W_VAL, self.map_num_id(source, el.get(W_VAL)))
+            elif tag == WP_DOCPR:
+                el.set("id", str(self.next_docpr_id))
+                self.next_docpr_id += 1
+            elif tag in NOTE_TAGS:
+                notes.append(el)
+
+            for name, value in el.attrib.items():
+                if name.startswith(R_NS):
+                    el.set(name, self.map_rid(source, value))
+
+        for el in notes:
+            el.getparent().remove(el)
+        return len(notes)
+
+    def ensure_style(self, source, style_id):
+        """Adds a style (and the styles it is based on) unless a style with that ID is already merged."""
+        if style_id is None or style_id in self.style_ids or self.styles_root is None:
+            return
+        style = source.styles.get(style_id)
+        if style is None:
+            return
+
+        self.style_ids.add(style_id)
+        style = copy.deepcopy(style)
+        self.styles_root.append(style)
+        for tag in STYLE_CHAIN_TAGS:
+            ref = style.find(tag)
+            if ref is not None:
+                self.ensure_style(source, ref.get(W_VAL))
+        for num_id in style.iter(W_NUM_ID):
+            num_id.set(W_VAL, self.map_num_id(source, num_id.get(W_VAL)))
+
+    def map_num_id(self, source, num_id):
+        """Copies a list definition into the merged numbering part, once per source document."""
+        if num_id in source.num_map:
+            return source.num_map[num_id]
+
+        nums, abstract_nums = source.numbering
+        num = nums.get(num_id)
+        if num_id == "0" or num is None:
+            return num_id
+
+        num = copy.deepcopy(num)
+        abstract_ref = num.find(W_ABSTRACT_NUM_ID)
+        old_abstract_id = abstract_ref.get(W_VAL)
+        if old_abstract_id not in abstract_nums:
+            return num_id
+        if old_abstract_id not in source.abstract_map:
+            abstract_num = copy.deepcopy(abstract_nums[old_abstract_id])
+            new_abstract_id = str(self.next_abstract_id)
+            self.next_abstract_id += 1
+            abstract_num.set(W_ABSTRACT_NUM_ID, new_abstract_id)
+            self.new_abstract_nums.write(etree.tostring(abstract_num))
+            source.abstract_map[old_abstract_id] = new_abstract_id
+        abstract_ref.set(W_VAL, source.abstract_map[old_abstract_id])
+
+        new_num_id = str(self.next_num_id)
+        self.next_num_id += 1
+        num.set(W_NUM_ID, new_num_id)
+        self.new_nums.write(etree.tostring(num))
+        source.num_map[num_id] = new_num_id
+        return new_num_id
+
+    def map_rid(self, source, rid):
+        """Gives a relationship from the source document a new ID, copying its target part if internal."""
+        if rid in source.rid_map:
+            return source.rid_map[rid]
+        rel = source.rels.get(rid)
+        if rel is None:
+            return rid
+
+        rel = copy.deepcopy(rel)
+        if rel.get("TargetMode") != "External":
+            part_name = resolve_target(DOCUMENT_PART, rel.get("Target"))
+            new_part = self.copy_part(source, part_name)
+            rel.set("Target", posixpath.relpath(new_part, "word"))
+
+        new_rid = self.new_rel_id()
+        rel.set("Id", new_rid)
+        self.write_rel(rel)
+        source.rid_map[rid] = new_rid
+        return new_rid
+
+    def write_rel(self, rel):
+        self.new_rels.write(strip_inherited_namespaces(etree.tostring(rel), self.rels_declarations))
+
+    def new_rel_id(self):
+        while f"rId{self.next_rid}" in self.rel_ids:
+            self.next_rid += 1
+        rid = f"rId{self.next_rid}"
+        self.rel_ids.add(rid)
+        return rid
+
+    def copy_part(self, source, part_name):
+        """Copies a part (and, recursively, the parts its own relationships point to) under a free name."""
+        if part_name in source.copied_parts:
+            return source.copied_parts[part_name]
+        if part_name not in source.infos:
+            return part_name
+
+        new_name = part_name
+        stem, ext = posixpath.splitext(part_name)
+        counter = 1
+        while new_name in self.used_names:
+            new_name = f"{stem}_{counter}{ext}"
+            counter += 1
+        self.used_names.add(new_name)
+        source.copied_parts[part_name] = new_name
+
+        kind, content_type = source.content_type(part_name)
+        if kind == "Override":
+            etree.SubElement(self.content_types, CT_NS + "Override", PartName="/" + new_name, ContentType=content_type)
+        elif ext[1:].lower() not in self.defaults and content_type:
+            self.defaults.add(ext[1:].lower())
+            etree.SubElement(self.content_types, CT_NS + "Default", Extension=ext[1:].lower(), ContentType=content_type)
+
+        rels_name = rels_part_name(part_name)
+        if rels_name in source.infos:
+            rels = source.read_xml(rels_name)
+            for rel in rels.iter(PR_NS + "Relationship"):
+                if rel.get("TargetMode") != "External":
+                    target = self.copy_part(source, resolve_target(part_name, rel.get("Target")))
+                    rel.set("Target", posixpath.relpath(target, posixpath.dirname(new_name)))
+            self.used_names.add(rels_part_name(new_name))
+            with self.zout.open(rels_part_name(new_name), "w") as f:
+                f.write(etree.tostring(rels, xml_declaration=True, encoding="UTF-8", standalone=True))
+
+        source.package.copy_raw(source.infos[part_name], self.zout, new_name)
+        return new_name
+
+    def close(self):
+        """Writes the body and the rewritten package parts, then closes the output zip."""
+        if self.final_sect_pr is not None:
+            self.body.write(strip_inherited_namespaces(self.final_sect_pr, self.namespace_declarations))
+        while self.closing_tags:
+            self.body.write(self.closing_tags.pop())
+
+        if self.numbering_root is None and self.new_nums.tell():
+            self.add_numbering_part()
+
+        self.write_spooled(DOCUMENT_PART, self.body)
+        self.write_with_appended(DOCUMENT_RELS, self.rels_root, [self.new_rels])
+        if self.styles_root is not None:
+            self.write_xml(STYLES_PART, self.styles_root)
+        if self.numbering_root is not None:
+            self.write_numbering()
+        self.write_xml(CONTENT_TYPES, self.content_types)
+
+        for spool in (self.body, self.new_rels, self.new_abstract_nums, self.new_nums):
+            spool.close()
+        self.zout.close()
+
+    def add_numbering_part(self):
+        """Creates numbering.xml when the base document had none but appended ones use lists."""
+        self.numbering_root = etree.Element(W_NS + "numbering", nsmap={"w": W_NS[1:-1]})
+        self.write_rel(etree.Element(PR_NS + "Relationship", Id=self.new_rel_id(), Type=NUMBERING_REL_TYPE,
+                                     Target="numbering.xml"))
+        etree.SubElement(self.content_types, CT_NS + "Override", PartName="/" + NUMBERING_PART,
+                         ContentType=NUMBERING_CONTENT_TYPE)
+
+    def write_numbering(self):
+        """numbering.xml needs every w:abstractNum before the first w:num, so interleave base and new ones."""
+        abstract_nums = [el for el in self.numbering_root if el.tag == W_ABSTRACT_NUM]
+        nums = [el for el in self.numbering_root if el.tag == W_NUM]
+        others = [el for el in self.numbering_root if el.tag not in (W_ABSTRACT_NUM, W_NUM)]
+
+        declarations = namespace_declarations_for(self.numbering_root.nsmap)
+        head, tail = open_tag(self.numbering_root, [])
+        with self.zout.open(NUMBERING_PART, "w") as f:
+            f.write(XML_DECLARATION + head)
+            for el in abstract_nums:
+                f.write(strip_inherited_namespaces(etree.tostring(el), declarations))
+            self.copy_spool(self.new_abstract_nums, f)
+            for el in nums:
+                f.write(strip_inherited_namespaces(etree.tostring(el), declarations))
+            self.copy_spool(self.new_nums, f)
+            for el in others:
+                f.write(strip_inherited_namespaces(etree.tostring(el), declarations))
+            f.write(tail)
+
+    def write_with_appended(self, part_name, root, spools):
+        declarations = namespace_declarations_for(root.nsmap)
+        head, tail = open_tag(root, [])
+        with self.zout.open(part_name, "w") as f:
+            f.write(XML_DECLARATION + head)
+            for el in root:
+                f.write(strip_inherited_namespaces(etree.tostring(el), declarations))
+            for spool in spools:
+                self.copy_spool(spool, f)
+            f.write(tail)
+
+    def write_xml(self, part_name, root):
+        with self.zout.open(part_name, "w") as f:
+            f.write(etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True))
+
+    def write_spooled(self, part_name, spool):
+        with self.zout.open(part_name, "w", force_zip64=True) as f:
+            self.copy_spool(spool, f)
+
+    @staticmethod
+    def copy_spool(spool, destination):
+        spool.seek(0)
+        shutil.copyfileobj(spool, destination)
+
+def merge_documents_streaming(word_files, output_file_path, page_breaks=True):
+    """Merges word_files (in order) into output_file_path with bounded memory."""
+    merger = StreamingMerger(word_files[0], output_file_path)
+    try:
+        for file in word_files[1:]:
+            print(f"Adding: {file}")
+            merger.append(file, page_break=page_breaks)
+    finally:
+        merger.close()
+    return merger
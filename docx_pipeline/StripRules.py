@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import re
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python < 3.11
+    import tomli as tomllib
+
+NAMESPACES = {
+    "w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main",
+    "mc": "http://schemas.openxmlformats.org/markup-compatibility/2006",
+    "v": "urn:schemas-microsoft-com:vml",
+    "o": "urn:schemas-microsoft-com:office:office",
+}
+
+# Shipped inside the package (package data in pyproject.toml), so it is found installed or not
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "strip_rules.toml")
+
+def clark_name(prefixed):
+    """'w:drawing' -> '{http://...wordprocessingml/2006/main}drawing'"""
+    prefix, _, local = prefixed.partition(":")
+    if prefix not in NAMESPACES:
+        raise ValueError(f"Unknown namespace prefix in element rule {prefixed!r}")
+    return f"{{{NAMESPACES[prefix]}}}{local}"
+
+def union_pattern(literals=(), patterns=()):
+    """Compiles every literal and regex into one alternation, or None if there are none."""
+    parts = [re.escape(text) for text in literals] + [f"(?:{pattern})" for pattern in patterns]
+    return re.compile("|".join(parts)) if parts else None
+
+class StripRules:
+    """Removal rules compiled once into combined matchers.
+
+    However many rules there are, a table costs one regex search per cell plus one set
+    lookup per first-row cell, a paragraph one style lookup and one regex search, and a
+    run one set lookup per element, all inside the single document.xml pass.
+    """
+
+    def __init__(self, table_contains=(), header_cells=(), table_regex=(), paragraph_styles=(),
+                 paragraph_regex=(), run_elements=(), remove_orphaned_parts=True, compression_level=None):
+        # type() rather than isinstance(): true is an int too and would pass as level 1
+        if compression_level is not None and (type(compression_level) is not int or compression_level not in range(10)):
+            raise ValueError(f"compression_level must be 0-9, got {compression_level!r}")
+        self.source = {
+            "tables": {"contains": list(table_contains), "header_cell": list(header_cells), "regex": list(table_regex)},
+            "paragraphs": {"styles": list(paragraph_styles), "regex": list(paragraph_regex)},
+            "runs": {"elements": list(run_elements)},
+            "output": {"remove_orphaned_parts": remove_orphaned_parts, "compression_level": compression_level},
+        }
+        self.table_pattern = union_pattern(table_contains, table_regex)
+        self.header_cells = {text.strip().lower() for text in header_cells}
+        self.paragraph_styles = set(paragraph_styles)
+        self.paragraph_pattern = union_pattern(patterns=paragraph_regex)
+        self.run_elements = {clark_name(name) for name in run_elements}
+        self.remove_orphaned_parts = remove_orphaned_parts
+        self.compression_level = compression_level
+
+    @classmethod
+    def from_dict(cls, data):
+        tables = data.get("tables", {})
+        paragraphs = data.get("paragraphs", {})
+        runs = data.get("runs", {})
+        output = data.get("output", {})
+        return cls(
+            table_contains=tables.get("contains", []),
+            header_cells=tables.get("header_cell", []),
+            table_regex=tables.get("regex", []),
+            paragraph_styles=paragraphs.get("styles", []),
+            paragraph_regex=paragraphs.get("regex", []),
+            run_elements=runs.get("elements", []),
+            remove_orphaned_parts=output.get("remove_orphaned_parts", True),
+            compression_level=output.get("compression_level"),
+        )
+
+    @property
+    def version(self):
+        """Changes whenever the rules change, for the incremental build manifest."""
+        return hashlib.sha256(json.dumps(self.source, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+    @property
+    def has_paragraph_rules(self):
+        return bool(self.paragraph_styles) or self.paragraph_pattern is not None
+
+    def table_matches(self, rows):
+        """rows is a list of rows of cell texts (see DocxWalker.table_rows)."""
+        if not rows:
+            return False
+        if self.table_pattern is not None:
+            search = self.table_pattern.search
+            if any(search(text) for row in rows for text in row):
+                return True
+        return any(text.strip().lower() in self.header_cells for text in rows[0])
+
+    def paragraph_text_matches(self, text):
+        """Style rules are resolved to style IDs per document by the caller; this checks the regexes."""
+        return self.paragraph_pattern is not None and self.paragraph_pattern.search(text) is not None
+
+def load_rules(path=None):
+    """Loads rules from a .toml file (or .yaml/.yml with PyYAML installed); defaults to strip_rules.toml."""
+    if path is None:
+        path = DEFAULT_RULES_PATH
+    if path.endswith((".yaml", ".yml")):
+        import yaml
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+    else:
+        with open(path, "rb") as f:
+            data = tomllib.load(f)
+    return StripRules.from_dict(data)
@@ -0,0 +1,266 @@
+import contextlib
+import os
+import tempfile
+import time
+import zipfile
+from lxml import etree
+
+from .BatchJournal import BatchJournal
+from .BatchRunner import atomic_output, list_input_files, run_batch
+from .BuildManifest import BuildManifest, config_version, incremental_jobs, record_succeeded
+from .DocxPackage import (XML_DECLARATION, PackageReader, compact_package, namespace_declarations_for, open_tag,
+                         relationship_ids, strip_inherited_namespaces)
+from .DocxWalker import load_paragraph_styles, paragraph_style_id, paragraph_text, table_rows
+from .Instrumentation import TimedReader, TimedWriter, current_metrics, file_size
+from .StripRules import load_rules
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+W_BODY = W_NS + "body"
+W_TBL = W_NS + "tbl"
+W_P = W_NS + "p"
+W_R = W_NS + "r"
+
+# Bump when the stripping logic changes so the incremental cache rebuilds everything
+STRIP_ENGINE_VERSION = 3
+
+DOCUMENT_PART = "word/document.xml"
+# The stripped document.xml is compressed into memory up to this size before spilling to disk
+BODY_SPOOL_SIZE = 64 * 1024 * 1024
+
+# Phases timed inside the document.xml pass; whatever else the pass spends is counted as "parse"
+PASS_PHASES = ("inflate", "match_tables", "serialize", "deflate")
+
+def paragraph_style_matcher(zin, rules):
+    """Resolves the style-name rules to this document's style IDs, so each paragraph needs one set lookup."""
+    if not rules.paragraph_styles:
+        return set()
+    style_names, default_style = load_paragraph_styles(zin)
+    matching = {style_id for style_id, name in style_names.items() if name in rules.paragraph_styles}
+    if default_style in rules.paragraph_styles:
+        matching.add(None)  # Paragraphs without a w:pStyle use the default style
+    return matching
+
+def iter_stripped_body(source, destination, rules, matching_style_ids, removed, referenced=None):
+    """Streams document.xml once, dropping whatever the rules match, and writes the rest through.
+
+    Each body-level element is serialized as soon as it is complete and then discarded,
+    so memory stays bounded by the largest single paragraph or table instead of the whole document.
+    Kept top-level elements are yielded just before they are discarded, so later stages
+    (e.g. the JSON converters in Pipeline.py) can reuse this parse; removal counts go into removed,
+    and the relationship IDs the kept elements still use into referenced, if given.
+    """
+    metrics = current_metrics()
+    timed_before = sum(metrics.phases.get(phase, 0.0) for phase in PASS_PHASES)
+    busy = 0.0  # Time spent in this pass, not counting the consumer's time between yields
+    resumed = time.perf_counter()
+
+    marked_runs = set()
+    root = body = None
+    namespace_declarations = []
+    closing_tags = []
+
+    destination.write(XML_DECLARATION)
+
+    for event, element in etree.iterparse(source, events=("start", "end"), huge_tree=True):
+        if event == "start":
+            if root is None:
+                root = element
+                head, tail = open_tag(root, [])
+                namespace_declarations = namespace_declarations_for(root.nsmap)
+                destination.write(head)
+                closing_tags.append(tail)
+            elif body is None and element.tag == W_BODY and element.getparent() is root:
+                body = element
+                head, tail = open_tag(body, namespace_declarations)
+                destination.write(head)
+                closing_tags.append(tail)
+            continue
+
+        tag = element.tag
+
+        # ✅ **Mark runs holding a removable element, e.g. an image (directly or via mc:AlternateContent)**
+        if tag in rules.run_elements:
+            for run in element.iterancestors(W_R):
+                marked_runs.add(run)
+                break
+            continue
+
+        if tag == W_R and element in marked_runs:
+            marked_runs.discard(element)
+            element.getparent().remove(element)
+            removed["runs"] += 1
+            continue
+
+        parent = element.getparent()
+        if parent is None:
+            break
+
+        if parent is body or (parent is root and element is not body):
+            metrics.count("body_elements")
+            # ✅ **Top-level tables and paragraphs are checked against the compiled rules**
+            if parent is body and tag == W_TBL:
+                start = time.perf_counter()
+                remove_table = rules.table_matches(table_rows(element))
+                metrics.add_time("match_tables", time.perf_counter() - start)
+            else:
+                remove_table = False
+
+            if remove_table:
+                removed["tables"] += 1
+            elif parent is body and tag == W_P and rules.has_paragraph_rules and (
+                    paragraph_style_id(element) in matching_style_ids
+                    or (rules.paragraph_pattern is not None and rules.paragraph_text_matches(paragraph_text(element)))):
+                removed["paragraphs"] += 1
+            else:
+                start = time.perf_counter()
+                markup = strip_inherited_namespaces(etree.tostring(element), namespace_declarations)
+                if referenced is not None:
+                    referenced.update(relationship_ids(element))
+                metrics.add_time("serialize", time.perf_counter() - start)
+                destination.write(markup)
+
+                busy += time.perf_counter() - resumed
+                yield element
+                resumed = time.perf_counter()
+            parent.remove(element)
+        elif element is body:
+            destination.write(closing_tags.pop())
+
+    while closing_tags:
+        destination.write(closing_tags.pop())
+
+    busy += time.perf_counter() - resumed
+    timed = sum(metrics.phases.get(phase, 0.0) for phase in PASS_PHASES) - timed_before
+    metrics.add_time("parse", max(busy - timed, 0.0))
+
+def strip_document(doc_path, output_path, rules, consume_body=None):
+    """Strips one .docx, copying every part except document.xml as raw compressed bytes.
+
+    If rules.remove_orphaned_parts is set, images and other parts the stripped document no
+    longer refers to are dropped too (see DocxPackage.compact_package); if rules.compression_level
+    is set, every part is recompressed at that level instead of copied as is (level 0 stores them
+    uncompressed).
+
+    doc_path and output_path may be paths or seekable file objects. consume_body, if given,
+    is called as consume_body(zin, kept_elements) with the open input zip and an iterator
+    over the kept top-level elements, while document.xml is being written.
+    """
+    metrics = current_metrics()
+    bytes_in = file_size(doc_path)
+    metrics.bytes_in += bytes_in
+    removed = {"tables": 0, "paragraphs": 0, "runs": 0, "parts": 0}
+    referenced = set() if rules.remove_orphaned_parts else None
+    level = rules.compression_level
+    compression = zipfile.ZIP_STORED if level == 0 else zipfile.ZIP_DEFLATED
+
+    with PackageReader(doc_path) as package, tempfile.SpooledTemporaryFile(BODY_SPOOL_SIZE) as spool:
+        zin = package.zip
+        with metrics.phase("styles"):
+            matching_style_ids = paragraph_style_matcher(zin, rules)
+
+        # document.xml is stripped first, into a zip of its own, so what it still references is
+        # known before the parts that come ahead of it (like [Content_Types].xml) are written
+        with zipfile.ZipFile(spool, "w", compression, compresslevel=level) as body_zip:
+            with zin.open(DOCUMENT_PART) as source, body_zip.open(DOCUMENT_PART, "w", force_zip64=True) as destination:
+                kept = iter_stripped_body(TimedReader(source, metrics), TimedWriter(destination, metrics),
+                                          rules, matching_style_ids, removed, referenced)
+                if consume_body is not None:
+                    consume_body(zin, kept)
+                for _ in kept:
+                    pass
+
+        rewritten, dropped = {}, set()
+        if referenced is not None:
+            with metrics.phase("compact"):
+                rewritten, dropped = compact_package(zin, DOCUMENT_PART, referenced)
+            removed["parts"] = sum(1 for name in dropped if not name.endswith(".rels"))
+
+        # A path is written through a temp file and renamed into place once complete
+        target = contextlib.nullcontext(output_path) if hasattr(output_path, "write") else atomic_output(output_path)
+        with target as target_path, PackageReader(spool) as body, \
+                zipfile.ZipFile(target_path, "w", compression) as zout:
+            for info in package.infolist():
+                if info.filename in dropped:
+                    continue
+                with metrics.phase("copy_parts"):
+                    if info.filename == DOCUMENT_PART:
+                        body.copy_raw(body.infos[DOCUMENT_PART], zout)
+                    elif info.filename in rewritten or level is not None:
+                        data = rewritten[info.filename] if info.filename in rewritten else zin.read(info)
+                        new_info = zipfile.ZipInfo(info.filename, info.date_time)
+                        new_info.external_attr = info.external_attr
+                        zout.writestr(new_info, data, compression, level)
+                    else:
+                        package.copy_raw(info, zout)
+            save_started = time.perf_counter()
+
+    metrics.add_time("save", time.perf_counter() - save_started)
+    bytes_out = file_size(output_path)
+    metrics.bytes_out += bytes_out
+    for kind, count in removed.items():
+        metrics.count(f"{kind}_removed", count)
+    removed["bytes_saved"] = bytes_in - bytes_out
+    return removed
+
+def format_size(size):
+    if abs(size) >= 1024 * 1024:
+        return f"{size / (1024 * 1024):.1f} MB"
+    return f"{size / 1024:.1f} KB"
+
+def format_removed(removed):
+    saved = removed["bytes_saved"]
+    size_change = f"{format_size(saved)} saved" if saved >= 0 else f"{format_size(-saved)} larger"
+    return (f"{removed['tables']} tables, {removed['paragraphs']} paragraphs, {removed['runs']} runs, "
+            f"{removed['parts']} unused parts removed, {size_change}")
+
+def strip_file(filename, doc_path, output_path, rules):
+    """Batch worker: strips one document and reports what was removed."""
+    removed = strip_document(doc_path, output_path, rules)
+    print(f"✅ Processed: {filename} ({format_removed(removed)})")
+
+def remove_text_tables_and_images(input_directory, output_directory, workers=None, incremental=True, rules_path=None,
+                                  journal=False, retry_failed=False, limits=None):
+    """Strips every .docx in input_directory using the rules in rules_path (strip_rules.toml by default).
+
+    journal=True records each document's outcome in output_directory as it finishes, so a
+    batch that dies partway resumes where it stopped; retry_failed=True reruns only the
+    documents that failed (see BatchJournal). limits is an optional BatchRunner.DocumentLimits.
+    """
+    rules = load_rules(rules_path)
+
+    # Ensure output directory exists
+    os.makedirs(output_directory, exist_ok=True)
+
+    # Skip temporary Word files (~$) and anything that isn't a .docx
+    filenames, skipped = list_input_files(input_directory)
+
+    jobs = []
+    paths = {}
+    for filename in filenames:
+        doc_path = os.path.join(input_directory, filename)
+        output_path = os.path.join(output_directory, filename)
+        paths[filename] = (doc_path, output_path)
+        jobs.append((filename, (filename, doc_path, output_path, rules)))
+
+    version = config_version(STRIP_ENGINE_VERSION, rules.version)
+    batch_journal = BatchJournal(output_directory, "StripWordDoc", version, paths) if journal or retry_failed else None
+    options = {"workers": workers, "stage": "strip", "journal": batch_journal, "retry_failed": retry_failed,
+               "limits": limits}
+
+    if not incremental:
+        return run_batch(strip_file, jobs, skipped=skipped, **options)
+
+    # Only rebuild documents whose content or stripping rules changed
+    manifest = BuildManifest(output_directory, "StripWordDoc", version)
+    jobs, up_to_date = incremental_jobs(manifest, input_directory, jobs, paths)
+    print(f"⏭️ {len(up_to_date)} unchanged, {len(jobs)} to process")
+
+    summary = run_batch(strip_file, jobs, skipped=skipped + up_to_date, **options)
+    record_succeeded(manifest, summary, paths)
+    return summary
+
+if __name__ == "__main__":
+    # Example usage
+    input_directory = "/Users/km/Documents/Projects/Combine_Word_Docs/Convert"
+    output_directory = "/Users/km/Documents/Projects/Combine_Word_Docs/Clean"
+    remove_text_tables_and_images(input_directory, output_directory)
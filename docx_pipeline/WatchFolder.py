@@ -0,0 +1,165 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+import zipfile
+
+# inotify event flags (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# struct inotify_event: int wd; uint32_t mask, cookie, len; char name[len]
+EVENT_HEADER = struct.Struct("iIII")
+
+class InotifyWatcher:
+    """Reports the names of changed files in one directory through Linux inotify (via ctypes)."""
+
+    def __init__(self, directory):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"Cannot watch {directory}")
+
+    def changes(self, timeout):
+        """Waits up to timeout seconds and returns the set of file names that changed."""
+        names = set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return names
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return names
+
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if name:
+                names.add(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """Fallback for systems without inotify: rescans the directory every interval seconds."""
+
+    def __init__(self, directory, interval=0.5):
+        self.directory = directory
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    snapshot[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def changes(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        snapshot = self.scan()
+        names = {name for name, signature in snapshot.items() if self.snapshot.get(name) != signature}
+        names.update(name for name in self.snapshot if name not in snapshot)
+        self.snapshot = snapshot
+        return names
+
+    def close(self):
+        pass
+
+def open_watcher(directory, polling=False, poll_interval=0.5):
+    """Watches with inotify on Linux and falls back to polling anywhere else (or when asked to)."""
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(directory)
+        except (OSError, AttributeError) as e:  # AttributeError: a libc without inotify
+            print(f"⚠️ inotify unavailable ({e}), polling every {poll_interval}s instead")
+    return PollingWatcher(directory, poll_interval)
+
+def lock_file_names(filename):
+    """Owner/lock files Word and LibreOffice keep next to a document while it is open."""
+    # Word replaces the first one or two characters of longer names with ~$
+    return {"~$" + filename, "~$" + filename[1:], "~$" + filename[2:], f".~lock.{filename}#"}
+
+def file_signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+class Debouncer:
+    """Holds changed documents back until they have stopped changing for `settle` seconds.
+
+    A document is only released once it is not open in Word or LibreOffice (no lock file
+    next to it) and reads as a complete zip, so a half-copied .docx is never processed, even
+    if the copy stalls for a while. One that stays unreadable and unchanged for `give_up`
+    seconds is released anyway so its error gets reported. Lock files themselves and other
+    file types are ignored, like the batch loops do.
+    """
+
+    def __init__(self, directory, settle=0.25, extensions=(".docx",), give_up=60.0):
+        self.directory = directory
+        self.settle = settle
+        self.give_up = give_up
+        self.extensions = tuple(extensions)
+        # file name -> (time it is checked next, size and mtime when last checked, time it last changed)
+        self.pending = {}
+
+    def touch(self, names, now):
+        for name in names:
+            if name.startswith("~$") or not name.endswith(self.extensions):
+                continue
+            self.pending[name] = (now + self.settle, None, None)
+
+    def next_deadline(self):
+        return min((deadline for deadline, _, _ in self.pending.values()), default=None)
+
+    def ready(self, now):
+        """Returns (documents ready to process, documents that disappeared while pending)."""
+        ready = []
+        removed = []
+        existing = None
+        for name, (deadline, last_signature, changed) in list(self.pending.items()):
+            if deadline > now:
+                continue
+            path = os.path.join(self.directory, name)
+            signature = file_signature(path)
+            if signature is None:
+                del self.pending[name]
+                removed.append(name)
+                continue
+
+            if existing is None:
+                existing = set(os.listdir(self.directory))
+            if lock_file_names(name) & existing:
+                self.pending[name] = (now + self.settle, None, None)  # Open in Word; check again later
+                continue
+            if not zipfile.is_zipfile(path):
+                if signature != last_signature:
+                    changed = now
+                if now - changed < self.give_up:
+                    self.pending[name] = (now + self.settle, signature, changed)  # Probably still being written
+                    continue
+                print(f"⚠️ {name} has not been a complete .docx for {self.give_up:g} seconds; processing it anyway")
+
+            del self.pending[name]
+            ready.append(name)
+        return sorted(ready), removed
@@ -0,0 +1,5 @@
+"""Combine Word documents, strip tables and images, and convert them to JSON and PDF.
+
+Each module also runs on its own, e.g. python -m docx_pipeline.StripWordDoc; the
+docx-pipeline command (Pipeline.py) runs the stages together.
+"""
@@ -0,0 +1,50 @@
+import os
+
+from docx_pipeline.BatchRunner import run_batch
+from docx_pipeline.BuildManifest import BuildManifest, incremental_jobs, record_succeeded
+
+def copy_then_overwrite(input_path, output_path):
+    """Builds output_path from input_path, then overwrites the input as if it was saved again mid-run."""
+    with open(input_path, "rb") as f:
+        data = f.read()
+    with open(output_path, "wb") as f:
+        f.write(data)
+    with open(input_path, "wb") as f:
+        f.write(b"new version, longer than the old one")
+
+def plan(input_dir, output_dir):
+    manifest = BuildManifest(output_dir, "Test", "1")
+    input_path = os.path.join(input_dir, "doc.docx")
+    paths = {"doc.docx": (input_path, os.path.join(output_dir, "doc.out"))}
+    jobs = [("doc.docx", paths["doc.docx"])]
+    to_build, up_to_date = incremental_jobs(manifest, input_dir, jobs, paths)
+    return manifest, paths, to_build, up_to_date
+
+def test_input_changed_during_run_is_rebuilt(tmp_path):
+    input_dir, output_dir = tmp_path / "in", tmp_path / "out"
+    input_dir.mkdir()
+    output_dir.mkdir()
+    (input_dir / "doc.docx").write_bytes(b"old version")
+
+    manifest, paths, to_build, _ = plan(str(input_dir), str(output_dir))
+    summary = run_batch(copy_then_overwrite, to_build, workers=1)
+    record_succeeded(manifest, summary, paths)
+    assert (output_dir / "doc.out").read_bytes() == b"old version"
+
+    _, _, to_build, up_to_date = plan(str(input_dir), str(output_dir))
+    assert up_to_date == []
+    assert [name for name, _ in to_build] == ["doc.docx"]
+
+def test_unchanged_input_is_skipped(tmp_path):
+    input_dir, output_dir = tmp_path / "in", tmp_path / "out"
+    input_dir.mkdir()
+    output_dir.mkdir()
+    (input_dir / "doc.docx").write_bytes(b"old version")
+    (output_dir / "doc.out").write_bytes(b"old version")
+
+    manifest, paths, to_build, _ = plan(str(input_dir), str(output_dir))
+    record_succeeded(manifest, {"succeeded": [name for name, _ in to_build]}, paths)
+
+    _, _, to_build, up_to_date = plan(str(input_dir), str(output_dir))
+    assert up_to_date == ["doc.docx"]
+    assert to_build == []